@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from stub_services import start_stubs
+from synthetic_media import ensure_videos
+
+
+# -----------------------------------------------------------------------------
+# Environment
+# -----------------------------------------------------------------------------
+STAGES = ("probe", "download", "decode_audio", "transcribe", "analyze", "clip", "upload_wait", "total")
+
+# The agent reads its configuration at import time, so the stubs and every --set override
+# are put in the environment before highlight_agent is imported
+def configure_environment(args, workdir):
+    os.environ.update({
+        "HIGHLIGHT_AGENT_SEED": os.getenv("HIGHLIGHT_AGENT_SEED") or "highlight-benchmark",
+        "GEMINI_API_KEY": "stub",
+        "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{args.gemini_port}",
+        "SUPABASE_URL": f"http://127.0.0.1:{args.storage_port}",
+        # supabase-py only accepts JWT-shaped keys
+        "SUPABASE_KEY": "stub.stub.stub",
+        "SUPABASE_BUCKET_HIGHLIGHT_NAME": "highlights",
+        "HIGHLIGHT_CACHE_DIR": os.path.join(workdir, "cache"),
+        "WORKSPACE_DIR": os.path.join(workdir, "workspace"),
+    })
+    for assignment in args.set:
+        key, _, value = assignment.partition("=")
+        os.environ[key] = value
+
+
+def import_agent():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import highlight_agent
+    return highlight_agent
+
+
+def clear_cache(agent):
+    # Every run starts cold unless --warm is given, so each stage is actually executed
+    for layer in ("media", "transcripts", "analyses", "uploads"):
+        directory = os.path.join(agent.highlight_cache.root, layer)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+def summarize(runs):
+    rows = []
+    for name in dict.fromkeys(run["video"] for run in runs):
+        group = [run for run in runs if run["video"] == name]
+        row = {"video": name, "media_s": group[0]["media_s"], "runs": len(group)}
+        for stage in STAGES:
+            values = [run["timings"].get(stage, 0.0) for run in group]
+            row[stage] = sum(values) / len(values)
+        for key in ("rtf", "peak_rss_mb"):
+            values = [run["resources"].get(key, 0.0) for run in group]
+            row[key] = sum(values) / len(values)
+        rows.append(row)
+    return rows
+
+
+def print_table(rows):
+    columns = ["video", "media_s", *STAGES, "rtf", "peak_rss_mb"]
+    widths = {column: max(len(column), 10) for column in columns}
+    widths["video"] = max([len("video")] + [len(row["video"]) for row in rows])
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(
+            (f"{row[column]:.2f}" if isinstance(row[column], float) else str(row[column])).rjust(widths[column])
+            for column in columns
+        ))
+
+
+
+# -----------------------------------------------------------------------------
+# Run
+# -----------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end highlight pipeline benchmark against local Gemini/Supabase stubs.")
+    parser.add_argument("--lengths", default="60,300", help="comma-separated synthetic video lengths in seconds")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--workdir", default=None, help="keeps rendered videos between runs; a temp dir by default")
+    parser.add_argument("--warm", action="store_true", help="keep the highlight cache between repeats")
+    parser.add_argument("--no-tts", action="store_true")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="agent setting, e.g. --set WHISPER_MODEL=tiny --set CLIP_MODE=copy")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--upload-mbps", type=float, default=100.0)
+    parser.add_argument("--gemini-port", type=int, default=8901)
+    parser.add_argument("--storage-port", type=int, default=8902)
+    parser.add_argument("--media-port", type=int, default=8903)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="highlight_bench_"))
+    media_dir = os.path.join(workdir, "media")
+    lengths = [float(value) for value in args.lengths.split(",") if value]
+    configure_environment(args, workdir)
+    names = ensure_videos(media_dir, lengths, os.getenv("FFMPEG_PATH") or "ffmpeg", tts=not args.no_tts)
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="stubs", daemon=True).start()
+    (gemini, storage, _), _ = asyncio.run_coroutine_threadsafe(start_stubs(
+        media_dir, gemini_port=args.gemini_port, storage_port=args.storage_port, media_port=args.media_port,
+        gemini_latency_ms=args.gemini_latency_ms, upload_mbps=args.upload_mbps,
+    ), loop).result()
+
+    agent = import_agent()
+    # Model loading is startup cost, not job cost, so it happens before the timed runs
+    agent.whisper_registry.get()
+    runs = []
+    for name, seconds in zip(names, lengths):
+        url = f"http://127.0.0.1:{args.media_port}/{name}"
+        for repeat in range(args.repeats):
+            if not args.warm:
+                clear_cache(agent)
+            clips, trace = agent.traced_generate_highlights(url)
+            runs.append({"video": name, "media_s": seconds, "repeat": repeat, "clips": len(clips), **trace})
+            if not args.json:
+                print(f"{name} #{repeat + 1}: {len(clips)} clips in {trace['timings']['total']:.2f}s")
+
+    report = {
+        "settings": {assignment.partition("=")[0]: assignment.partition("=")[2] for assignment in args.set},
+        "summary": summarize(runs),
+        "runs": runs,
+        "gemini_calls": gemini.calls,
+        "uploaded_mb": storage.uploaded_bytes / (1024 * 1024),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print()
+        print_table(report["summary"])
+        print(f"\ngemini calls: {report['gemini_calls']}, uploaded: {report['uploaded_mb']:.1f} MB, workdir: {workdir}")
+    if agent.parallel_transcriber:
+        agent.parallel_transcriber.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import subprocess
+
+import requests
+
+
+# -----------------------------------------------------------------------------
+# Startup Probe
+# -----------------------------------------------------------------------------
+# Starts the highlight agent in a subprocess and times how long it takes to answer /health
+# (serving) and to report every dependency ready, against a budget in seconds.
+AGENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "highlight_agent.py")
+
+# Imports each module in a fresh interpreter, in order, and prints how long each import_module call took
+IMPORT_TIMER = """
+import sys, json, time, importlib
+timings = {}
+for name in sys.argv[1:]:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = round(time.perf_counter() - start, 3)
+print(json.dumps(timings))
+"""
+
+
+def agent_imports():
+    """Modules imported at the top of the agent, in source order."""
+    with open(AGENT_PATH, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def time_imports():
+    """Per-module import times of the agent, which its own serving_s/ready_s do not include."""
+    result = subprocess.run([sys.executable, "-c", IMPORT_TIMER, *agent_imports()], cwd=os.path.dirname(AGENT_PATH),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Importing the agent's modules failed:\n{result.stderr}")
+    return json.loads(result.stdout)
+
+
+def wait_for_health(url, process, timeout, need_ready):
+    start = time.perf_counter()
+    serving = None
+    health = None
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise SystemExit(f"Agent exited with code {process.returncode} before it was {'ready' if serving else 'serving'}")
+        try:
+            health = requests.get(url, timeout=1).json()
+            if serving is None:
+                serving = time.perf_counter() - start
+            if not need_ready or health.get("ready") or health.get("status") == "degraded":
+                return serving, time.perf_counter() - start, health
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.05)
+    return serving, None, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure highlight agent startup time against a budget.")
+    parser.add_argument("--url", default="http://127.0.0.1:8001/health")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET_S") or "3"),
+                        help="max seconds from process start until /health answers")
+    parser.add_argument("--ready-budget", type=float, default=None, help="optional max seconds until every check is ready")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    import_timings = time_imports()
+    process = subprocess.Popen([sys.executable, AGENT_PATH], cwd=os.path.dirname(AGENT_PATH),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        serving, ready, health = wait_for_health(args.url, process, args.timeout, need_ready=True)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    report = {
+        "serving_s": serving,
+        "ready_s": ready,
+        "budget_s": args.budget,
+        "status": (health or {}).get("status"),
+        "checks": (health or {}).get("checks"),
+        "errors": (health or {}).get("errors"),
+        "import_s": round(sum(import_timings.values()), 3),
+        "agent_serving_s": (health or {}).get("serving_s"),
+        "agent_timings_s": (health or {}).get("timings_s"),
+        "import_timings_s": import_timings,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+    over = serving is None or serving > args.budget
+    if args.ready_budget is not None:
+        over = over or ready is None or ready > args.ready_budget
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
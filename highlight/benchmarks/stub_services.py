@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import mimetypes
+
+
+# -----------------------------------------------------------------------------
+# HTTP Server
+# -----------------------------------------------------------------------------
+# One small asyncio HTTP/1.1 server for all the stubs. Handlers take (method, path, headers,
+# body) and return (status, headers, body) where body is bytes, a dict/list (sent as JSON)
+# or a (path, start, end) tuple streamed from disk.
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 206: "Partial Content", 400: "Bad Request",
+           404: "Not Found", 409: "Conflict", 416: "Range Not Satisfiable", 500: "Internal Server Error"}
+
+
+async def read_body(reader, headers):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return bytes(body)
+            body.extend(await reader.readexactly(size))
+            await reader.readline()
+    return await reader.readexactly(int(headers.get("content-length", "0")))
+
+
+async def write_response(writer, method, status, headers, body):
+    file_range = body if isinstance(body, tuple) else None
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    length = file_range[2] - file_range[1] + 1 if file_range else len(body or b"")
+    headers.setdefault("Content-Length", str(length))
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+    writer.write(head.encode("latin-1"))
+    if method == "HEAD":
+        pass
+    elif file_range:
+        path, start, end = file_range
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                writer.write(chunk)
+                remaining -= len(chunk)
+                await writer.drain()
+    elif body:
+        writer.write(body)
+    await writer.drain()
+
+
+async def serve_connection(handler, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await read_body(reader, headers)
+            status, response_headers, response_body = await handler(method, path, headers, body)
+            await write_response(writer, method, status, dict(response_headers), response_body)
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(handler, host="127.0.0.1", port=0):
+    return await asyncio.start_server(lambda r, w: serve_connection(handler, r, w), host, port)
+
+
+
+# -----------------------------------------------------------------------------
+# Stub Gemini
+# -----------------------------------------------------------------------------
+# Answers generateContent on the REST API. Point the agent at it with
+#   GEMINI_API_ENDPOINT=http://127.0.0.1:8901 GEMINI_API_KEY=stub
+CANDIDATE_RE = re.compile(r"Candidate \d+ \(([0-9.]+)s-([0-9.]+)s\)")
+PICK_RE = re.compile(r"Pick the (\d+) most")
+
+
+class StubGemini:
+    def __init__(self, latency_ms=800.0, jitter=0.3, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def answer(self, prompt):
+        candidates = [(float(a), float(b)) for a, b in CANDIDATE_RE.findall(prompt)]
+        if not candidates:
+            # Legacy free-text prompt: [MM:SS] lines
+            return "\n".join(f"[00:{10 * i:02d}] Stub highlight {i}" for i in range(1, 4))
+        wanted = int(PICK_RE.search(prompt).group(1)) if PICK_RE.search(prompt) else 5
+        return json.dumps([
+            {"start": start, "end": min(end, start + 20.0), "description": f"Stub highlight {i}", "score": 10 - i}
+            for i, (start, end) in enumerate(candidates[:wanted], 1)
+        ])
+
+    async def handle(self, method, path, headers, body):
+        if method == "GET" and path == "/stats":
+            return 200, {}, {"calls": self.calls}
+        if method != "POST" or ":generateContent" not in path:
+            return 404, {}, {"error": {"code": 404, "message": f"no stub for {method} {path}"}}
+        self.calls += 1
+        delay = self.latency_ms / 1000.0
+        await asyncio.sleep(delay * self.rng.lognormvariate(0.0, self.jitter) if self.jitter else delay)
+        request = json.loads(body or b"{}")
+        prompt = "\n".join(part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", []))
+        return 200, {}, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": self.answer(prompt)}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 50, "totalTokenCount": len(prompt) // 4 + 50},
+        }
+
+
+
+# -----------------------------------------------------------------------------
+# Stub Supabase Storage
+# -----------------------------------------------------------------------------
+# Accepts standard and TUS resumable uploads and throttles them to upload_mbps. Point the agent at it with
+#   SUPABASE_URL=http://127.0.0.1:8902 SUPABASE_KEY=stub.stub.stub SUPABASE_BUCKET_HIGHLIGHT_NAME=highlights
+class StubStorage:
+    def __init__(self, upload_mbps=100.0, latency_ms=50.0):
+        self.upload_mbps = upload_mbps
+        self.latency_ms = latency_ms
+        self.objects = {}
+        self.sessions = {}
+        self.uploaded_bytes = 0
+
+    async def transfer(self, nbytes):
+        self.uploaded_bytes += nbytes
+        seconds = self.latency_ms / 1000.0
+        if self.upload_mbps:
+            seconds += nbytes * 8 / (self.upload_mbps * 1_000_000)
+        await asyncio.sleep(seconds)
+
+    async def handle(self, method, path, headers, body):
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == "/stats":
+            return 200, {}, {"objects": len(self.objects), "uploaded_bytes": self.uploaded_bytes}
+
+        if method == "GET" and path.startswith("/storage/v1/bucket/"):
+            name = path.rsplit("/", 1)[1]
+            now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            return 200, {}, {"id": name, "name": name, "owner": "", "public": True, "created_at": now,
+                             "updated_at": now, "file_size_limit": None, "allowed_mime_types": None}
+
+        if method in ("POST", "PUT") and path.startswith("/storage/v1/object/"):
+            key = path[len("/storage/v1/object/"):]
+            await self.transfer(len(body))
+            self.objects[key] = len(body)
+            return 200, {}, {"Key": key, "Id": uuid.uuid4().hex}
+
+        if method == "POST" and path == "/storage/v1/upload/resumable":
+            upload_id = uuid.uuid4().hex
+            self.sessions[upload_id] = {"length": int(headers.get("upload-length", "0")), "offset": 0}
+            return 201, {"Location": f"/storage/v1/upload/resumable/{upload_id}", "Tus-Resumable": "1.0.0"}, b""
+
+        if path.startswith("/storage/v1/upload/resumable/"):
+            session = self.sessions.get(path.rsplit("/", 1)[1])
+            if session is None:
+                return 404, {}, {"error": "unknown upload"}
+            if method == "PATCH":
+                if int(headers.get("upload-offset", "-1")) != session["offset"]:
+                    return 409, {}, {"error": "offset mismatch"}
+                await self.transfer(len(body))
+                session["offset"] += len(body)
+            return 204, {"Upload-Offset": str(session["offset"]), "Tus-Resumable": "1.0.0"}, b""
+
+        return 404, {}, {"error": f"no stub for {method} {path}"}
+
+
+
+# -----------------------------------------------------------------------------
+# Media Server
+# -----------------------------------------------------------------------------
+class MediaServer:
+    """Serves files from a directory with Range, If-Range and ETag support, like a CDN in front of VOD storage."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    async def handle(self, method, path, headers, body):
+        path = os.path.abspath(os.path.join(self.root, path.split("?", 1)[0].lstrip("/")))
+        if method not in ("GET", "HEAD") or not path.startswith(self.root) or not os.path.isfile(path):
+            return 404, {}, {"error": "not found"}
+        stat = os.stat(path)
+        response_headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"',
+            "Last-Modified": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(stat.st_mtime)),
+            "Content-Type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+        }
+        match = re.match(r"bytes=(\d+)-(\d*)", headers.get("range", ""))
+        if_range = headers.get("if-range")
+        if match and (not if_range or if_range in (response_headers["ETag"], response_headers["Last-Modified"])):
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else stat.st_size - 1, stat.st_size - 1)
+            if start > end:
+                return 416, {"Content-Range": f"bytes */{stat.st_size}"}, b""
+            response_headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            return 206, response_headers, (path, start, end)
+        return 200, response_headers, (path, 0, stat.st_size - 1)
+
+
+
+# -----------------------------------------------------------------------------
+# Run
+# -----------------------------------------------------------------------------
+async def start_stubs(media_root, host="127.0.0.1", gemini_port=8901, storage_port=8902, media_port=8903,
+                      gemini_latency_ms=800.0, upload_mbps=100.0, seed=None):
+    gemini = StubGemini(latency_ms=gemini_latency_ms, seed=seed)
+    storage = StubStorage(upload_mbps=upload_mbps)
+    media = MediaServer(media_root)
+    servers = [
+        await start_server(gemini.handle, host, gemini_port),
+        await start_server(storage.handle, host, storage_port),
+        await start_server(media.handle, host, media_port),
+    ]
+    return (gemini, storage, media), servers
+
+
+async def run(args):
+    _, servers = await start_stubs(args.media_root, args.host, args.gemini_port, args.storage_port, args.media_port,
+                                   args.gemini_latency_ms, args.upload_mbps, args.seed)
+    print(f"Stub Gemini   on http://{args.host}:{args.gemini_port}  (GEMINI_API_ENDPOINT)")
+    print(f"Stub Supabase on http://{args.host}:{args.storage_port}  (SUPABASE_URL)")
+    print(f"Media files   on http://{args.host}:{args.media_port}/ from {os.path.abspath(args.media_root)}")
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Gemini, Supabase Storage and a media CDN for highlight benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--gemini-port", type=int, default=8901)
+    parser.add_argument("--storage-port", type=int, default=8902)
+    parser.add_argument("--media-port", type=int, default=8903)
+    parser.add_argument("--media-root", default="bench_media")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--upload-mbps", type=float, default=100.0, help="simulated upload bandwidth, 0 for unlimited")
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
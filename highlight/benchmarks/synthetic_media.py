@@ -0,0 +1,126 @@
+import os
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+
+# -----------------------------------------------------------------------------
+# Script
+# -----------------------------------------------------------------------------
+# Calm commentary with a hype line every few sentences, so Whisper has words to transcribe
+# and the pre-scorer has keyword and loudness peaks to find
+CALM_LINES = [
+    "okay chat we are back, let me check the map real quick",
+    "so the plan is to rotate through the middle and hold this building",
+    "thanks for the follow, really appreciate it",
+    "I think they are going to push from the left side this time",
+    "let me grab some ammo and reload before the next fight",
+]
+HYPE_LINES = [
+    "oh my god no way, that was insane, let's go!",
+    "what a clutch, one versus three and we won it!",
+    "holy, did you see that? unbelievable!",
+]
+
+
+def script_lines(count):
+    lines = []
+    for i in range(count):
+        lines.append(HYPE_LINES[(i // 4) % len(HYPE_LINES)] if i % 4 == 3 else CALM_LINES[i % len(CALM_LINES)])
+    return lines
+
+
+
+# -----------------------------------------------------------------------------
+# Audio
+# -----------------------------------------------------------------------------
+def tts_binary():
+    return shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+def has_flite(ffmpeg_cmd):
+    result = subprocess.run([ffmpeg_cmd, "-hide_banner", "-filters"], capture_output=True, text=True)
+    return " flite " in result.stdout
+
+
+def speech_track(path, seconds, ffmpeg_cmd="ffmpeg"):
+    """Write a speech track of at least `seconds` with espeak(-ng) or ffmpeg's flite filter; False if neither exists."""
+    lines = script_lines(max(4, int(seconds / 4)))
+    binary = tts_binary()
+    if binary:
+        subprocess.run([binary, "-s", "165", "-w", path, ". ".join(lines)], check=True, capture_output=True)
+        return True
+    if has_flite(ffmpeg_cmd):
+        text = ". ".join(lines).replace("'", "").replace(":", "").replace(",", "")
+        subprocess.run([ffmpeg_cmd, "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"flite=text='{text}'", path], check=True)
+        return True
+    return False
+
+
+def tone_source(seconds, burst_every=45, burst_length=5):
+    # A quiet 220 Hz bed with a loud chirp for burst_length seconds out of every burst_every
+    expression = (f"0.05*sin(2*PI*220*t)*(1-gte(mod(t,{burst_every}),{burst_every - burst_length}))"
+                  f"+0.6*sin(2*PI*(440+200*mod(t,1))*t)*gte(mod(t,{burst_every}),{burst_every - burst_length})")
+    return f"aevalsrc='{expression}':s=48000:d={seconds}"
+
+
+
+# -----------------------------------------------------------------------------
+# Video
+# -----------------------------------------------------------------------------
+def make_video(path, seconds, ffmpeg_cmd="ffmpeg", tts=True, size="1280x720", rate=30, gop=60):
+    """Render a test video of `seconds` with lavfi test patterns, speech (when TTS is available) and tone bursts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        speech = os.path.join(tmp, "speech.wav")
+        with_speech = tts and speech_track(speech, seconds, ffmpeg_cmd)
+
+        cmd = [
+            ffmpeg_cmd, "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}:duration={seconds}",
+            "-f", "lavfi", "-i", tone_source(seconds),
+        ]
+        if with_speech:
+            cmd += ["-stream_loop", "-1", "-i", speech,
+                    "-filter_complex", "[2:a]aresample=48000,volume=1.5[s];[1:a][s]amix=inputs=2:duration=first[a]",
+                    "-map", "0:v", "-map", "[a]"]
+        else:
+            cmd += ["-map", "0:v", "-map", "1:a"]
+        cmd += [
+            "-t", str(seconds),
+            "-c:v", "libx264", "-preset", "veryfast", "-g", str(gop), "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", path,
+        ]
+        subprocess.run(cmd, check=True)
+    return with_speech
+
+
+def ensure_videos(directory, lengths, ffmpeg_cmd="ffmpeg", tts=True):
+    """Create (or reuse) one synthetic video per length and return their file names."""
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for seconds in lengths:
+        name = f"synthetic_{int(seconds)}s.mp4"
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            print(f"Rendering {name}...")
+            if not make_video(path, seconds, ffmpeg_cmd, tts):
+                print("No TTS available (install espeak-ng), using tone bursts only")
+        names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render synthetic stream videos for the highlight benchmark.")
+    parser.add_argument("--output", default="bench_media")
+    parser.add_argument("--lengths", default="60,300,900", help="comma-separated lengths in seconds")
+    parser.add_argument("--ffmpeg", default=os.getenv("FFMPEG_PATH") or "ffmpeg")
+    parser.add_argument("--no-tts", action="store_true")
+    args = parser.parse_args()
+    lengths = [float(value) for value in args.lengths.split(",") if value]
+    for name in ensure_videos(args.output, lengths, args.ffmpeg, tts=not args.no_tts):
+        print(os.path.join(args.output, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import time
+import base64
+import hashlib
+import threading
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+
+
+class DownloadError(Exception):
+    pass
+
+
+
+# -------------------------------------------------------------------------
+# Ranged Downloader
+# -------------------------------------------------------------------------
+class RangedDownloader:
+    """Downloads over one pooled session, splitting large files into parallel HTTP Range requests.
+
+    Each part is retried from the last byte it wrote, the size is always checked, and the
+    MD5 digest is checked when the server advertises one (Content-MD5 or x-goog-hash).
+    HEAD results are cached briefly so validating, keying and downloading a URL cost one probe.
+    """
+
+    def __init__(self, workers=4, part_mb=16, buffer_kb=1024, retries=3, timeout=30.0, min_parallel_mb=32, probe_ttl=60.0):
+        self.workers = max(1, workers)
+        self.part_size = max(1, int(part_mb * 1024 * 1024))
+        self.buffer_size = max(1024, int(buffer_kb * 1024))
+        self.retries = max(1, retries)
+        self.timeout = timeout
+        self.min_parallel_bytes = int(min_parallel_mb * 1024 * 1024)
+        self.probe_ttl = probe_ttl
+        self.probes: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers * 2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def probe(self, url) -> Optional[Dict]:
+        """HEAD the URL and return its size, validators and range support, or None if unreachable."""
+        with self.lock:
+            cached = self.probes.get(url)
+            if cached and time.monotonic() - cached[0] < self.probe_ttl:
+                return cached[1]
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        headers = response.headers
+        info = {
+            'status': response.status_code,
+            'url': response.url,
+            'size': int(headers["Content-Length"]) if headers.get("Content-Length", "").isdigit() else None,
+            'content_type': headers.get("Content-Type", ""),
+            'etag': headers.get("ETag"),
+            'last_modified': headers.get("Last-Modified"),
+            'ranges': headers.get("Accept-Ranges", "").lower() == "bytes",
+            'md5': self.advertised_md5(headers),
+        }
+        with self.lock:
+            self.probes[url] = (time.monotonic(), info)
+            while len(self.probes) > 256:
+                self.probes.popitem(last=False)
+        return info
+
+    @staticmethod
+    def advertised_md5(headers) -> Optional[str]:
+        if headers.get("Content-MD5"):
+            return headers["Content-MD5"]
+        for item in headers.get("x-goog-hash", "").split(","):
+            name, _, value = item.strip().partition("=")
+            if name == "md5":
+                return value
+        return None
+
+    def download(self, url, path, sha256=None) -> str:
+        """Download url to path and return path; sha256 is an optional expected hex digest."""
+        info = self.probe(url) or {}
+        # Servers that refuse HEAD still get a plain GET, which reports the real error
+        if info.get('status') != 200:
+            info = {}
+        size = info.get('size')
+        if size and info.get('ranges') and size >= self.min_parallel_bytes and self.workers > 1:
+            etag = info.get('etag')
+            validator = etag if etag and not etag.startswith("W/") else info.get('last_modified')
+            self._download_parts(url, path, size, validator)
+        else:
+            self._download_stream(url, path, size)
+        self.verify(path, size, info.get('md5'), sha256)
+        return path
+
+    def _download_parts(self, url, path, size, validator):
+        with open(path, "wb") as file:
+            file.truncate(size)
+        parts = [(start, min(start + self.part_size, size) - 1) for start in range(0, size, self.part_size)]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(parts)), thread_name_prefix="download") as pool:
+            for future in [pool.submit(self._download_part, url, path, start, end, validator) for start, end in parts]:
+                future.result()
+
+    def _download_part(self, url, path, start, end, validator):
+        position, attempt = start, 0
+        with open(path, "r+b") as file:
+            while position <= end:
+                headers = {"Range": f"bytes={position}-{end}"}
+                if validator:
+                    # If the file changed since the probe the server answers 200 instead of mixing versions
+                    headers["If-Range"] = validator
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                        if response.status_code != 206:
+                            raise DownloadError(f"Range request for {url} answered {response.status_code}")
+                        file.seek(position)
+                        for chunk in response.iter_content(chunk_size=self.buffer_size):
+                            file.write(chunk[:end + 1 - position])
+                            position += len(chunk)
+                            if position > end:
+                                break
+                    if position <= end:
+                        raise requests.ConnectionError("connection closed before the range was complete")
+                except requests.RequestException as e:
+                    attempt += 1
+                    if attempt >= self.retries:
+                        raise DownloadError(f"Download of bytes {start}-{end} failed after {attempt} attempts: {e}")
+                    time.sleep(min(2 ** attempt, 10))
+
+    def _download_stream(self, url, path, size=None):
+        position, attempt = 0, 0
+        with open(path, "wb") as file:
+            while True:
+                # After a failure, resume from the last written byte when the server supports ranges
+                headers = {"Range": f"bytes={position}-"} if position else {}
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                        if response.status_code == 200 and position:
+                            file.seek(0)
+                            file.truncate()
+                            position = 0
+                        elif response.status_code not in (200, 206):
+                            raise DownloadError(f"Failed to download video. Status code: {response.status_code}")
+                        for chunk in response.iter_content(chunk_size=self.buffer_size):
+                            file.write(chunk)
+                            position += len(chunk)
+                    if size is not None and position < size:
+                        raise requests.ConnectionError("connection closed before the file was complete")
+                    return
+                except requests.RequestException as e:
+                    attempt += 1
+                    if attempt >= self.retries:
+                        raise DownloadError(f"Download failed after {attempt} attempts: {e}")
+                    time.sleep(min(2 ** attempt, 10))
+
+    def verify(self, path, size=None, md5=None, sha256=None):
+        actual_size = os.path.getsize(path)
+        if size is not None and actual_size != size:
+            raise DownloadError(f"Downloaded {actual_size} bytes, expected {size}")
+        if not md5 and not sha256:
+            return
+        md5_digest, sha256_digest = hashlib.md5(), hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(self.buffer_size):
+                if md5:
+                    md5_digest.update(chunk)
+                if sha256:
+                    sha256_digest.update(chunk)
+        if md5 and base64.b64encode(md5_digest.digest()).decode() != md5:
+            raise DownloadError(f"MD5 mismatch for {path}")
+        if sha256 and sha256_digest.hexdigest() != sha256.lower():
+            raise DownloadError(f"SHA-256 mismatch for {path}")
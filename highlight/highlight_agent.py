@@ -1,19 +1,47 @@
 import os
-import whisper
+import re
+import asyncio
+import json
+import time
+import base64
+import shutil
+import hashlib
+import threading
+import subprocess
+import multiprocessing
+import heapq
+import itertools
+from collections import OrderedDict, deque
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import ffmpeg
+import tempfile
+import numpy as np
 import requests
 import traceback
 from datetime import datetime
-from typing import List, Dict
+from urllib.parse import urlparse, urljoin
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from uagents import Agent, Context, Protocol, Model
 from uagents_core.contrib.protocols.chat import(
     ChatMessage, ChatAcknowledgement, TextContent, chat_protocol_spec
 )
 from uagents.setup import fund_agent_if_low
-from google.generativeai import configure, GenerativeModel
 from uuid import uuid4
-from supabase import create_client, Client
+from transcription import TranscriptionModel, ParallelTranscriber, SAMPLE_RATE
+from scoring import candidate_windows, loudness_per_second, scene_changes, scaled_score, build_prompt, parse_highlights_json
+from downloader import RangedDownloader
+from workspace import Workspace
+from tracing import JobTrace
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Startup timings count from here; benchmarks/startup_time.py measures the imports above separately
+MODULE_LOADED_AT = time.perf_counter()
 
 load_dotenv()
 
@@ -29,8 +57,75 @@ class Config:
         self.SUPABASE_URL= os.getenv("SUPABASE_URL")
         self.SUPABASE_KEY = os.getenv("SUPABASE_KEY")
         self.SUPABASE_BUCKET_HIGHLIGHT_NAME = os.getenv("SUPABASE_BUCKET_HIGHLIGHT_NAME")
-        os.environ["PATH"] += os.pathsep + os.getenv("FFMPEG_DIR_PATH")
+        if os.getenv("FFMPEG_DIR_PATH"):
+            os.environ["PATH"] += os.pathsep + os.getenv("FFMPEG_DIR_PATH")
         self.FFMPEG_PATH = os.getenv("FFMPEG_PATH")
+        self.WHISPER_BACKEND = os.getenv("WHISPER_BACKEND") or "openai"
+        self.WHISPER_MODEL = os.getenv("WHISPER_MODEL") or "base"
+        self.WHISPER_DEVICE = os.getenv("WHISPER_DEVICE") or "cpu"
+        self.WHISPER_THREADS = int(os.getenv("WHISPER_THREADS") or "0")
+        self.WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE") or "int8"
+        self.WHISPER_PRELOAD = (os.getenv("WHISPER_PRELOAD") or "1") == "1"
+        self.GEMINI_MODEL = os.getenv("GEMINI_MODEL") or "gemini-2.0-flash"
+        self.GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+        self.STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_S") or "3")
+        self.TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS") or "1")
+        self.TRANSCRIBE_VAD = os.getenv("TRANSCRIBE_VAD", "0") == "1"
+        self.TRANSCRIBE_WORKER_MEMORY_ESTIMATE_MB = int(os.getenv("TRANSCRIBE_WORKER_MEMORY_ESTIMATE_MB") or "1500")
+        self.VAD_MAX_CHUNK_S = float(os.getenv("VAD_MAX_CHUNK_S") or "30")
+        self.VAD_MIN_SILENCE_S = float(os.getenv("VAD_MIN_SILENCE_S") or "0.5")
+        self.VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB") or "10")
+        self.TRANSCRIBE_MODE = os.getenv("TRANSCRIBE_MODE") or "download"
+        self.AUDIO_MMAP_DIR = os.getenv("AUDIO_MMAP_DIR")
+        self.HIGHLIGHT_PRESCORE = (os.getenv("HIGHLIGHT_PRESCORE") or "1") == "1"
+        self.HIGHLIGHT_CANDIDATES = int(os.getenv("HIGHLIGHT_CANDIDATES") or "8")
+        self.HIGHLIGHT_WINDOW_S = float(os.getenv("HIGHLIGHT_WINDOW_S") or "30")
+        self.HIGHLIGHT_STRIDE_S = float(os.getenv("HIGHLIGHT_STRIDE_S") or "10")
+        self.HIGHLIGHT_SCENES = (os.getenv("HIGHLIGHT_SCENES") or "1") == "1"
+        self.CLIP_MIN_S = float(os.getenv("CLIP_MIN_S") or "5")
+        self.CLIP_MAX_S = float(os.getenv("CLIP_MAX_S") or "60")
+        self.HIGHLIGHT_CACHE_DIR = os.getenv("HIGHLIGHT_CACHE_DIR") or "cache"
+        self.HIGHLIGHT_CACHE_MAX_MB = int(os.getenv("HIGHLIGHT_CACHE_MAX_MB") or "20480")
+        self.CLIP_MODE = os.getenv("CLIP_MODE") or "smart"
+        self.CLIP_WORKERS = int(os.getenv("CLIP_WORKERS") or str(os.cpu_count() or 1))
+        self.CLIP_PRESET = os.getenv("CLIP_PRESET") or "fast"
+        self.CLIP_THREADS = int(os.getenv("CLIP_THREADS") or "0")
+        self.CLIP_SNAP_TOLERANCE = float(os.getenv("CLIP_SNAP_TOLERANCE") or "2.0")
+        self.UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY") or "4")
+        self.UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES") or "3")
+        self.UPLOAD_RESUMABLE_MB = float(os.getenv("UPLOAD_RESUMABLE_MB") or "20")
+        self.DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS") or "4")
+        self.DOWNLOAD_PART_MB = float(os.getenv("DOWNLOAD_PART_MB") or "16")
+        self.DOWNLOAD_BUFFER_KB = int(os.getenv("DOWNLOAD_BUFFER_KB") or "1024")
+        self.DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES") or "3")
+        self.DOWNLOAD_TIMEOUT_S = float(os.getenv("DOWNLOAD_TIMEOUT_S") or "30")
+        self.DOWNLOAD_MIN_PARALLEL_MB = float(os.getenv("DOWNLOAD_MIN_PARALLEL_MB") or "32")
+        self.WORKSPACE_DIR = os.getenv("WORKSPACE_DIR") or "workspace"
+        self.WORKSPACE_MAX_MB = int(os.getenv("WORKSPACE_MAX_MB") or "10240")
+        self.WORKSPACE_JOB_MB = int(os.getenv("WORKSPACE_JOB_MB") or "512")
+        self.WORKSPACE_TMPFS_DIR = os.getenv("WORKSPACE_TMPFS_DIR")
+        self.WORKSPACE_TMPFS_MIN_FREE_MB = int(os.getenv("WORKSPACE_TMPFS_MIN_FREE_MB") or "512")
+        self.WORKSPACE_WAIT_S = float(os.getenv("WORKSPACE_WAIT_S") or "60")
+        self.HIGHLIGHT_WORKER_MODE = os.getenv("HIGHLIGHT_WORKER_MODE") or "thread"
+        self.HIGHLIGHT_WORKERS = int(os.getenv("HIGHLIGHT_WORKERS") or "2")
+        self.HIGHLIGHT_QUEUE_SIZE = int(os.getenv("HIGHLIGHT_QUEUE_SIZE") or "8")
+        self.HIGHLIGHT_JOB_RETENTION = int(os.getenv("HIGHLIGHT_JOB_RETENTION") or "500")
+        self.TRACE_SAMPLE_S = float(os.getenv("TRACE_SAMPLE_S") or "0.5")
+        self.LIVE_DIR = os.getenv("LIVE_DIR") or "live"
+        self.LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS") or "2")
+        self.LIVE_WINDOW_S = float(os.getenv("LIVE_WINDOW_S") or "30")
+        self.LIVE_OVERLAP_S = float(os.getenv("LIVE_OVERLAP_S") or "10")
+        self.LIVE_RETENTION_S = float(os.getenv("LIVE_RETENTION_S") or "180")
+        self.LIVE_POLL_S = float(os.getenv("LIVE_POLL_S") or "2")
+        self.LIVE_CANDIDATE_WINDOW_S = float(os.getenv("LIVE_CANDIDATE_WINDOW_S") or "15")
+        self.LIVE_CANDIDATE_STRIDE_S = float(os.getenv("LIVE_CANDIDATE_STRIDE_S") or "5")
+        self.LIVE_CANDIDATES = int(os.getenv("LIVE_CANDIDATES") or "2")
+        self.LIVE_TOP_K = int(os.getenv("LIVE_TOP_K") or "5")
+        self.LIVE_MIN_SCORE = float(os.getenv("LIVE_MIN_SCORE") or "0")
+        self.LIVE_USE_LLM = (os.getenv("LIVE_USE_LLM") or "1") == "1"
+        self.LIVE_FILE_CHUNK_S = float(os.getenv("LIVE_FILE_CHUNK_S") or "5")
+        self.LIVE_FILE_IDLE_POLLS = int(os.getenv("LIVE_FILE_IDLE_POLLS") or "5")
+        self.LIVE_ALLOW_LOCAL_FILES = os.getenv("LIVE_ALLOW_LOCAL_FILES", "0") == "1"
         
     def validate(self):
         if not self.GEMINI_API_KEY:
@@ -38,9 +133,41 @@ class Config:
         
 config = Config()
 config.validate()
-configure(api_key=os.getenv('GEMINI_API_KEY'))
-gemini_model = GenerativeModel('gemini-2.0-flash')
-supabase: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+
+
+
+# -------------------------------------------------------------------------
+# Clients
+# -------------------------------------------------------------------------
+# google.generativeai and supabase take seconds to import, so they are loaded on first
+# use (or by the background warm-up) instead of delaying the agent's startup
+gemini_model = None
+supabase = None
+clients_lock = threading.Lock()
+
+def get_gemini_model():
+    global gemini_model
+    if gemini_model is None:
+        with clients_lock:
+            if gemini_model is None:
+                from google.generativeai import configure, GenerativeModel
+                if config.GEMINI_API_ENDPOINT:
+                    # e.g. a local stub for benchmarks; the REST transport honours plain http:// endpoints
+                    configure(api_key=config.GEMINI_API_KEY, transport="rest",
+                              client_options={"api_endpoint": config.GEMINI_API_ENDPOINT})
+                else:
+                    configure(api_key=config.GEMINI_API_KEY)
+                gemini_model = GenerativeModel(config.GEMINI_MODEL)
+    return gemini_model
+
+def get_supabase():
+    global supabase
+    if supabase is None:
+        with clients_lock:
+            if supabase is None:
+                from supabase import create_client
+                supabase = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    return supabase
 
 
 
@@ -52,22 +179,397 @@ class HighlightRequest(Model):
 
 class HighlightResponse(Model):
     clips: List[Dict[str, str]]
+    status: str = "done"
+    error: Optional[str] = None
+
+class HighlightJobResponse(Model):
+    job_id: str
+    status: str
+    error: Optional[str] = None
+
+class HighlightJobRequest(Model):
+    job_id: str
+
+class HighlightJobResult(Model):
+    job_id: str
+    status: str
+    clips: List[Dict[str, str]] = []
+    error: Optional[str] = None
+    timings: Dict[str, float] = {}
+    resources: Dict[str, float] = {}
+
+class HighlightMetricsResponse(Model):
+    jobs: int
+    stages: Dict[str, Dict[str, float]]
+
+class LiveHighlightRequest(Model):
+    stream_url: str
+    max_duration_s: Optional[float] = None
+
+class LiveHighlightResponse(Model):
+    session_id: str
+    status: str
+    error: Optional[str] = None
+
+class LiveHighlightStop(Model):
+    session_id: str
+
+class LiveClipsRequest(Model):
+    session_id: str
+    cursor: int = 0
+    wait_s: float = 0.0
+
+class LiveHighlightClips(Model):
+    session_id: str
+    status: str
+    clips: List[Dict[str, str]] = []
+    cursor: int = 0
+    error: Optional[str] = None
+
+class HealthResponse(Model):
+    status: str
+    ready: bool
+    checks: Dict[str, bool]
+    errors: Dict[str, str] = {}
+    timings_s: Dict[str, float] = {}
+    serving_s: Optional[float] = None
+    ready_s: Optional[float] = None
+
+
+
+# -------------------------------------------------------------------------
+# Whisper Models
+# -------------------------------------------------------------------------
+class WhisperRegistry:
+    """Process-wide cache so each model size is loaded once and shared by every job."""
+
+    def __init__(self):
+        self.models: Dict[str, TranscriptionModel] = {}
+        self.lock = threading.Lock()
+
+    def get(self, size=None) -> TranscriptionModel:
+        size = size or config.WHISPER_MODEL
+        model = self.models.get(size)
+        if model is not None:
+            return model
+        with self.lock:
+            if size not in self.models:
+                print(f"Loading Whisper model '{size}' ({config.WHISPER_BACKEND}, {config.WHISPER_DEVICE})...")
+                try:
+                    self.models[size] = TranscriptionModel(
+                        config.WHISPER_BACKEND, size,
+                        device=config.WHISPER_DEVICE,
+                        threads=config.WHISPER_THREADS,
+                        compute_type=config.WHISPER_COMPUTE_TYPE,
+                    )
+                except Exception as e:
+                    raise Exception(f"Failed to load Whisper model: {e}")
+            return self.models[size]
+
+
+whisper_registry = WhisperRegistry()
+
+parallel_transcriber = ParallelTranscriber(
+    model_args={
+        'backend': config.WHISPER_BACKEND,
+        'size': config.WHISPER_MODEL,
+        'device': config.WHISPER_DEVICE,
+        'compute_type': config.WHISPER_COMPUTE_TYPE,
+    },
+    workers=config.TRANSCRIBE_WORKERS,
+    memory_estimate_mb=config.TRANSCRIBE_WORKER_MEMORY_ESTIMATE_MB,
+    vad_args={
+        'max_chunk': config.VAD_MAX_CHUNK_S,
+        'min_silence': config.VAD_MIN_SILENCE_S,
+        'margin_db': config.VAD_MARGIN_DB,
+    },
+) if config.TRANSCRIBE_VAD or config.TRANSCRIBE_WORKERS > 1 else None
+
+
+
+# -------------------------------------------------------------------------
+# Clip Engine
+# -------------------------------------------------------------------------
+def ffprobe_binary():
+    if config.FFMPEG_PATH:
+        directory, name = os.path.split(config.FFMPEG_PATH)
+        return os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+    return "ffprobe"
+
+
+def keyframe_before(video_path, timestamp, lookback=10.0):
+    """Latest video keyframe at or before timestamp, read from packet flags without decoding."""
+    cmd = [
+        ffprobe_binary(), "-v", "error", "-select_streams", "v:0",
+        "-read_intervals", f"{max(0.0, timestamp - lookback)}%{timestamp + 0.5}",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path,
+    ]
+    output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    best = None
+    for line in output.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" not in flags or pts in ("", "N/A"):
+            continue
+        pts = float(pts)
+        if pts <= timestamp + 1e-3 and (best is None or pts > best):
+            best = pts
+    return best
+
+
+class ClipEngine:
+    """Cuts clips in parallel ffmpeg processes with input-side seeking.
+
+    mode 'reencode' always encodes with libx264, 'copy' stream-copies from the keyframe
+    at or before each start, and 'smart' copies when that keyframe is within the snap
+    tolerance of the requested start and re-encodes otherwise.
+    """
+
+    def __init__(self, mode="smart", workers=1, preset="fast", threads=0, snap_tolerance=2.0):
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.preset = preset
+        self.threads = threads
+        self.snap_tolerance = snap_tolerance
+
+    def _reencode(self, video_path, start, duration, clip_path):
+        output_args = {'vcodec': 'libx264', 'preset': self.preset}
+        if self.threads:
+            output_args['threads'] = self.threads
+        (ffmpeg.input(video_path, ss=start, t=duration)
+            .output(clip_path, **output_args)
+            .overwrite_output()
+            .run(cmd=config.FFMPEG_PATH or "ffmpeg", quiet=True))
+
+    def _copy(self, video_path, start, duration, clip_path):
+        (ffmpeg.input(video_path, ss=start, t=duration)
+            .output(clip_path, c='copy', avoid_negative_ts='make_zero', movflags='+faststart')
+            .overwrite_output()
+            .run(cmd=config.FFMPEG_PATH or "ffmpeg", quiet=True))
+
+    def cut(self, video_path, start, duration, clip_path):
+        """Write one clip and return the (start, end) it actually covers."""
+        if self.mode in ("copy", "smart"):
+            try:
+                keyframe = keyframe_before(video_path, start)
+            except (subprocess.CalledProcessError, OSError, ValueError):
+                keyframe = None
+            if keyframe is not None and (self.mode == "copy" or start - keyframe <= self.snap_tolerance):
+                try:
+                    self._copy(video_path, keyframe, duration + (start - keyframe), clip_path)
+                    return keyframe, start + duration
+                except ffmpeg.Error:
+                    print(f"Stream copy failed for {clip_path}, re-encoding")
+        self._reencode(video_path, start, duration, clip_path)
+        return start, start + duration
+
+    def cut_all(self, video_path, cuts, on_done=None):
+        """cuts is a list of (start, duration, clip_path); results come back in the same order.
+
+        on_done(clip_path) is called from the worker thread as soon as each clip is written.
+        """
+        def run(cut):
+            result = self.cut(video_path, *cut)
+            if on_done:
+                on_done(cut[2])
+            return result
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(cuts)))) as pool:
+            return list(pool.map(run, cuts))
+
+
+clip_engine = ClipEngine(
+    mode=config.CLIP_MODE,
+    workers=config.CLIP_WORKERS,
+    preset=config.CLIP_PRESET,
+    threads=config.CLIP_THREADS,
+    snap_tolerance=config.CLIP_SNAP_TOLERANCE,
+)
+
+
+
+# -------------------------------------------------------------------------
+# Downloads & Workspace
+# -------------------------------------------------------------------------
+downloader = RangedDownloader(
+    workers=config.DOWNLOAD_WORKERS,
+    part_mb=config.DOWNLOAD_PART_MB,
+    buffer_kb=config.DOWNLOAD_BUFFER_KB,
+    retries=config.DOWNLOAD_RETRIES,
+    timeout=config.DOWNLOAD_TIMEOUT_S,
+    min_parallel_mb=config.DOWNLOAD_MIN_PARALLEL_MB,
+)
+
+workspace = Workspace(
+    root=config.WORKSPACE_DIR,
+    max_mb=config.WORKSPACE_MAX_MB,
+    tmpfs_dir=config.WORKSPACE_TMPFS_DIR,
+    tmpfs_min_free_mb=config.WORKSPACE_TMPFS_MIN_FREE_MB,
+    wait_s=config.WORKSPACE_WAIT_S,
+)
+
+
+
+# -------------------------------------------------------------------------
+# Cache
+# -------------------------------------------------------------------------
+def cache_key(parent, *parts):
+    """Derive a child key from a parent key and the settings that affect the stage, or None if uncacheable."""
+    if parent is None:
+        return None
+    return hashlib.sha256("|".join([parent, *map(str, parts)]).encode("utf-8")).hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HighlightCache:
+    """Content-addressed disk cache for media, transcripts, analyses and uploaded clip URLs, with an LRU size budget.
+
+    Each stage has its own layer keyed on its inputs, so e.g. a new analysis prompt still
+    reuses the cached transcript. Entries are files whose mtime is bumped on every hit.
+    Jobs pin the media they read with a shared flock, and eviction skips pinned media and
+    other writers' in-flight .tmp files.
+    """
+
+    def __init__(self, root="cache", max_mb=20480):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        for layer in ("media", "transcripts", "analyses", "uploads"):
+            os.makedirs(os.path.join(self.root, layer), exist_ok=True)
+
+    def source_key(self, video_url):
+        """Key a source on its URL plus ETag/Last-Modified/size, or None when it has no validators."""
+        if os.path.exists(video_url):
+            stat = os.stat(video_url)
+            return cache_key(os.path.abspath(video_url), stat.st_size, stat.st_mtime_ns)
+        info = downloader.probe(video_url)
+        if not info or info['status'] != 200 or not (info['etag'] or info['last_modified']):
+            return None
+        return cache_key(video_url, info['etag'], info['last_modified'], info['size'])
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_media(self, key):
+        if key is None:
+            return None
+        for name in os.listdir(os.path.join(self.root, "media")):
+            path = os.path.join(self.root, "media", name)
+            if name.split(".", 1)[0] == key and self._touch(path):
+                return path
+        return None
+
+    def put_media(self, downloaded_path, key=None):
+        """Move a finished download into the cache and return (cached_path, key); pin it before calling evict()."""
+        key = key or file_hash(downloaded_path)
+        ext = os.path.splitext(downloaded_path)[1]
+        path = os.path.join(self.root, "media", key + ext)
+        if os.path.exists(path):
+            os.remove(downloaded_path)
+            self._touch(path)
+        else:
+            shutil.move(downloaded_path, path)
+        return path, key
+
+    @contextmanager
+    def pin(self, path):
+        """Keep a cached media file from being evicted while a job reads it, across threads and processes."""
+        with open(path, "rb") as file:
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_SH)
+                # An evict() may have removed the file between the open and the lock
+                if os.fstat(file.fileno()).st_ino != os.stat(path).st_ino:
+                    raise FileNotFoundError(path)
+            self._touch(path)
+            yield path
+
+    def get_json(self, layer, key):
+        if key is None:
+            return None
+        path = os.path.join(self.root, layer, key + ".json")
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        self._touch(path)
+        return data
+
+    def put_json(self, layer, key, data):
+        if key is None:
+            return
+        path = os.path.join(self.root, layer, key + ".json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its size budget."""
+        with self.lock:
+            entries = []
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if self._remove_unpinned(path):
+                    total -= size
+
+    def _remove_unpinned(self, path):
+        try:
+            if not fcntl:
+                # Windows refuses to delete files that are open, which covers media in use
+                os.remove(path)
+                return True
+            with open(path, "rb") as file:
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False
+                os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+highlight_cache = HighlightCache(config.HIGHLIGHT_CACHE_DIR, config.HIGHLIGHT_CACHE_MAX_MB)
 
 
 
 # -------------------------------------------------------------------------
 # Class & Function
 # -------------------------------------------------------------------------
+TIMESTAMP_LINE_RE = re.compile(r"\[(\d+):(\d+(?:\.\d+)?)\]")
+
+
 class VideoProcessor:
 
     def __init__(self, clips_folder='clips'):
         self.clips_folder = os.path.abspath(clips_folder)
         os.makedirs(self.clips_folder, exist_ok=True)
         
-        try:
-            self.transcription_model = whisper.load_model(name="base", device="cpu")
-        except Exception as e:
-            raise Exception(f"Failed to load Whisper model: {e}")
+        self.transcription_model = whisper_registry.get()
         
     def download_video(self, video_url, downloads_folder='downloads'):
         downloads_folder = os.path.abspath(downloads_folder)
@@ -77,68 +579,144 @@ class VideoProcessor:
         video_filename_with_timestamp = f"{video_filename.rsplit('.', 1)[0]}_{datetime.now().timestamp():.0f}.{video_filename.rsplit('.', 1)[1]}"
         
         video_path = os.path.join(downloads_folder, video_filename_with_timestamp)
-        response = requests.get(video_url, stream=True)
-        if response.status_code == 200:
-            with open(video_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        file.write(chunk)
-            return video_path
-        else:
-            raise Exception(f"Failed to download video. Status code: {response.status_code}")
+        return downloader.download(video_url, video_path)
     
+    def load_audio(self, source, sample_rate=16000, start=None, duration=None):
+        """Decode only the audio track of a URL or file into mono float32 PCM through an ffmpeg pipe.
+
+        start/duration (seconds) decode just that range. With AUDIO_MMAP_DIR set, samples are
+        spooled to a file there and returned as a memmap.
+        """
+        input_args = {}
+        if start is not None:
+            input_args['ss'] = start
+        if duration is not None:
+            input_args['t'] = duration
+        process = (
+            ffmpeg.input(source, **input_args)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate, vn=None)
+            .global_args('-loglevel', 'error')
+            .run_async(cmd=config.FFMPEG_PATH or "ffmpeg", pipe_stdout=True, pipe_stderr=True)
+        )
+        chunk_size = 1 << 20
+        if config.AUDIO_MMAP_DIR:
+            os.makedirs(config.AUDIO_MMAP_DIR, exist_ok=True)
+            spool = tempfile.NamedTemporaryFile(dir=config.AUDIO_MMAP_DIR, suffix=".f32", delete=False)
+            pending = b""
+            with spool:
+                while chunk := process.stdout.read(chunk_size):
+                    chunk = pending + chunk
+                    usable = len(chunk) // 2 * 2
+                    spool.write((np.frombuffer(chunk[:usable], np.int16).astype(np.float32) / 32768.0).tobytes())
+                    pending = chunk[usable:]
+            buffer = None
+        else:
+            buffer = bytearray()
+            while chunk := process.stdout.read(chunk_size):
+                buffer.extend(chunk)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise Exception(f"Failed to decode audio from {source}: {stderr.decode(errors='ignore')[-500:]}")
+
+        if buffer is None:
+            try:
+                if os.path.getsize(spool.name) == 0:
+                    return np.zeros(0, dtype=np.float32)
+                return np.memmap(spool.name, dtype=np.float32, mode='r')
+            finally:
+                # The mapping stays valid after unlink, and the space is freed when it is dropped
+                os.unlink(spool.name)
+        # frombuffer views the bytearray without copying, and the scaling happens in place
+        audio = np.frombuffer(buffer, np.int16, count=len(buffer) // 2).astype(np.float32)
+        audio /= 32768.0
+        return audio
+
     def transcribe_video(self, video_path):
+        """Transcribe a path or decoded audio and return Whisper's result with 'text' and timed 'segments'."""
         print("Transcribing video...")
-        result = self.transcription_model.transcribe(video_path)
-        return result['text']
+        if parallel_transcriber:
+            audio = self.load_audio(video_path) if isinstance(video_path, str) else video_path
+            result = parallel_transcriber.transcribe(audio, model=self.transcription_model)
+        else:
+            result = self.transcription_model.transcribe(video_path)
+        return result
     
-    def analyze_highlights(self, transcript):
+    def analyze_highlights(self, transcript, audio=None, video_path=None):
         print("Analyzing highlights...")
-        prompt = f"""Analyze this video transcript and identify the 5 most highlight-worthy moments. 
-        For each highlight, provide an exact timestamp in [MM:SS] format and a brief, engaging description.
-        Transcript: {transcript}"""
-        
-        response = gemini_model.generate_content(prompt)
-        highlights = self.parse_gemini_response(response.text)
-        return highlights
+        segments = transcript.get('segments') or []
+        if not config.HIGHLIGHT_PRESCORE or not segments:
+            prompt = f"""Analyze this video transcript and identify the 5 most highlight-worthy moments. 
+            For each highlight, provide an exact timestamp in [MM:SS] format and a brief, engaging description.
+            Transcript: {transcript['text']}"""
+
+            response = get_gemini_model().generate_content(prompt)
+            highlights = self.parse_gemini_response(response.text)
+            return highlights
+
+        candidates = self.score_candidates(segments, audio, video_path)
+        prompt = build_prompt(candidates, min_length=config.CLIP_MIN_S, max_length=config.CLIP_MAX_S)
+        response = get_gemini_model().generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+        try:
+            return parse_highlights_json(response.text, candidates, min_length=config.CLIP_MIN_S, max_length=config.CLIP_MAX_S)
+        except (ValueError, TypeError):
+            print("Gemini did not return valid JSON, falling back to the timestamp parser")
+            return self.parse_gemini_response(response.text)
+
+    def score_candidates(self, segments, audio=None, video_path=None):
+        """Pick the top candidate windows on CPU so only those reach the LLM."""
+        duration = len(audio) / SAMPLE_RATE if audio is not None else segments[-1]['end']
+        loudness = loudness_per_second(audio) if audio is not None else None
+        scene_times = None
+        if config.HIGHLIGHT_SCENES and video_path and os.path.exists(video_path):
+            scene_times = scene_changes(video_path, config.FFMPEG_PATH or "ffmpeg")
+        return candidate_windows(
+            segments, duration,
+            loudness=loudness,
+            scene_times=scene_times,
+            window=config.HIGHLIGHT_WINDOW_S,
+            stride=config.HIGHLIGHT_STRIDE_S,
+            top_k=config.HIGHLIGHT_CANDIDATES,
+        )
     
     def parse_gemini_response(self, response_text):
         highlights = []
-        lines = [line.strip() for line in response_text.split('\n') if line.strip()]
-        
-        for line in lines:
-            if ']' in line and '[' in line:
-
-                time_part = line[line.find('[')+1:line.find(']')]
-                description = line[line.find(']')+1:].strip()
-                
-                mins, secs = map(float, time_part.split(':'))
-                start_time = mins * 60 + secs
-                end_time = start_time + 30
-                # end_time = min(start_time + 5, start_time + 30)
-                
-                highlights.append({
-                    'start': start_time,  
-                    'end': end_time,  
-                    'description': description
-                })
+        for line in response_text.split('\n'):
+            match = TIMESTAMP_LINE_RE.search(line)
+            if not match:
+                continue
+            try:
+                start_time = float(match.group(1)) * 60 + float(match.group(2))
+            except ValueError:
+                continue
+            end_time = start_time + 30
+            # end_time = min(start_time + 5, start_time + 30)
+
+            highlights.append({
+                'start': start_time,
+                'end': end_time,
+                'description': line[match.end():].strip()
+            })
         return highlights[:5]
 
-    def generate_clips(self, video_path, highlights, video_filename):
+    def generate_clips(self, video_path, highlights, video_filename, on_clip=None):
         print("Generating clips...")
-        clips = []
+        cuts = []
+        selected = []
         for i, highlight in enumerate(highlights, 1):
             start = float(highlight['start'])
             duration = float(highlight['end'] - highlight['start'])
             if duration <= 0:
                 continue
             clip_filename = f"{video_filename.rsplit('.', 1)[0]}_clip_{i}_{datetime.now().timestamp():.0f}.mp4"
-            clip_path = os.path.join(self.clips_folder, clip_filename)
-            ffmpeg.input(video_path, ss=start, t=duration).output(clip_path, vcodec='libx264', preset='fast').run(cmd=config.FFMPEG_PATH, quiet=True)
+            cuts.append((start, duration, os.path.join(self.clips_folder, clip_filename)))
+            selected.append((i, highlight))
+
+        clips = []
+        for (i, highlight), (_, _, clip_path), (start, end) in zip(selected, cuts, clip_engine.cut_all(video_path, cuts, on_clip)):
             clips.append({
                 'path': clip_path,
-                'start': highlight['start'],
-                'end': highlight['end'],
+                'start': start,
+                'end': end,
                 'description': highlight['description']
             })
             subtitle_text = highlight.get('subtitle', highlight['description'])
@@ -148,66 +726,864 @@ class VideoProcessor:
                 subtitle_file.write(subtitle_text)
         return clips
 
+storage_bucket = None
+upload_session = requests.Session()
+
+def get_storage_bucket():
+    global storage_bucket
+    if storage_bucket is None:
+        storage_bucket = get_supabase().storage.from_(config.SUPABASE_BUCKET_HIGHLIGHT_NAME)
+    return storage_bucket
+
+def upload_resumable(clip_path, object_name, size, chunk_size=6 * 1024 * 1024):
+    """TUS upload to Supabase Storage in 6 MB chunks, resuming from the server's offset after a failed chunk."""
+    endpoint = f"{config.SUPABASE_URL.rstrip('/')}/storage/v1/upload/resumable"
+    headers = {"Authorization": f"Bearer {config.SUPABASE_KEY}", "apikey": config.SUPABASE_KEY, "Tus-Resumable": "1.0.0"}
+    metadata = {"bucketName": config.SUPABASE_BUCKET_HIGHLIGHT_NAME, "objectName": object_name, "contentType": "video/mp4"}
+    encoded = ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items())
+
+    response = upload_session.post(endpoint, timeout=30, headers={
+        **headers, "Upload-Length": str(size), "Upload-Metadata": encoded, "x-upsert": "true",
+    })
+    response.raise_for_status()
+    location = urljoin(endpoint, response.headers["Location"])
+
+    offset, failures = 0, 0
+    with open(clip_path, "rb") as file:
+        while offset < size:
+            file.seek(offset)
+            chunk = file.read(chunk_size)
+            try:
+                response = upload_session.patch(location, data=chunk, timeout=120, headers={
+                    **headers, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream",
+                })
+                response.raise_for_status()
+                offset = int(response.headers["Upload-Offset"])
+                failures = 0
+            except requests.RequestException:
+                failures += 1
+                # Same meaning as in upload_clip: UPLOAD_RETRIES retries after a chunk's first failure
+                if failures > config.UPLOAD_RETRIES:
+                    raise
+                time.sleep(min(2 ** failures, 10))
+                head = upload_session.head(location, headers=headers, timeout=30)
+                head.raise_for_status()
+                offset = int(head.headers["Upload-Offset"])
+    return object_name
+
+def upload_clip(clip_path):
+    file_name = os.path.basename(clip_path)
+    size = os.path.getsize(clip_path)
+    # UPLOAD_RETRIES counts retries after the first attempt, like the resumable path's per-chunk retries
+    attempts = config.UPLOAD_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            if size > config.UPLOAD_RESUMABLE_MB * 1024 * 1024:
+                path = upload_resumable(clip_path, file_name, size)
+            else:
+                with open(clip_path, "rb") as file:
+                    # A failed attempt may still have created the object, so later attempts overwrite it
+                    response = get_storage_bucket().upload(file_name, file, {"upsert": "true"} if attempt > 1 else None)
+                path = response.path
+
+            if path:
+                url = get_storage_bucket().get_public_url(path)
+                return url
+            else:
+                print(f"Failed to upload {clip_path}: No path in response.")
+                return None
+        except Exception as e:
+            print(f"Error uploading clip {clip_path} (attempt {attempt}/{attempts}): {e}")
+            if attempt < attempts:
+                time.sleep(min(2 ** attempt, 10))
+    return None
+
+def timed_upload(clip_path):
+    start = time.perf_counter()
+    url = upload_clip(clip_path)
+    return url, time.perf_counter() - start
+
 async def upload_clip_to_supabase(clip_path):
-    try:
-        with open(clip_path, "rb") as file:
-            file_name = os.path.basename(clip_path)
-            response = supabase.storage.from_(config.SUPABASE_BUCKET_HIGHLIGHT_NAME).upload(file_name, file)
+    return await asyncio.to_thread(upload_clip, clip_path)
+
+def traced_generate_highlights(video_url):
+    """generate_highlights plus its trace as plain dicts, so it also works on the process pool."""
+    trace = JobTrace(sample_interval=config.TRACE_SAMPLE_S)
+    with trace:
+        clips = generate_highlights(video_url, trace)
+    return clips, trace.to_dict()
 
-        if response.path:
-            url = supabase.storage.from_(config.SUPABASE_BUCKET_HIGHLIGHT_NAME).get_public_url(response.path)
-            return url
+def generate_highlights(video_url, trace=None):
+    """Run the whole blocking pipeline for one video. Executed on the job worker pool."""
+    if config.TRANSCRIBE_MODE == "stream" and not is_http_url(video_url):
+        # ffmpeg opens this URL itself and would also take local paths and file:, concat:, subfile: inputs
+        raise ValueError("Stream mode only accepts http(s) video URLs")
+    trace = trace or JobTrace()
+    with trace.span("probe"):
+        source_key = highlight_cache.source_key(video_url)
+        cached_media = None if config.TRANSCRIBE_MODE == "stream" else highlight_cache.get_media(source_key)
+        expected_bytes = config.WORKSPACE_JOB_MB * 1024 * 1024
+        if config.TRANSCRIBE_MODE != "stream" and cached_media is None:
+            expected_bytes += (downloader.probe(video_url) or {}).get('size') or 0
+
+    # Downloads and clips live in a per-job workspace that is removed once the clips are uploaded
+    with workspace.job(expected_bytes) as space, ExitStack() as pins:
+        processor = VideoProcessor(clips_folder=space.scratch("clips"))
+        if config.TRANSCRIBE_MODE == "stream":
+            # Only the audio track is decoded up front; ffmpeg later range-reads just the clipped parts
+            video_path, media_key = video_url, source_key
+            video_filename = os.path.basename(urlparse(video_url).path) or "stream.mp4"
         else:
-            print(f"Failed to upload {clip_path}: No path in response.")
-            return None
-    except Exception as e:
-        print(f"Error uploading clip {clip_path}: {e}")
-        return None
+            video_path, media_key = cached_media, source_key
+            if video_path is not None:
+                try:
+                    pins.enter_context(highlight_cache.pin(video_path))
+                except FileNotFoundError:
+                    video_path = None
+            with trace.span("download", cached=video_path is not None):
+                if video_path is None:
+                    downloaded = processor.download_video(video_url, downloads_folder=space.dir("downloads"))
+                    trace.set('download_mb', os.path.getsize(downloaded) / (1024 * 1024))
+                    video_path, media_key = highlight_cache.put_media(downloaded, source_key)
+                    pins.enter_context(highlight_cache.pin(video_path))
+                    highlight_cache.evict()
+            video_filename = os.path.basename(urlparse(video_url).path) or os.path.basename(video_path)
+        return run_pipeline(processor, video_path, media_key, video_filename, trace)
+
+def run_pipeline(processor, video_path, media_key, video_filename, trace):
+    audio = None
+    def get_audio():
+        nonlocal audio
+        if audio is None:
+            with trace.span("decode_audio"):
+                audio = processor.load_audio(video_path)
+            trace.set('media_s', len(audio) / SAMPLE_RATE)
+        return audio
+
+    transcript_key = cache_key(media_key, "transcript", config.WHISPER_BACKEND, config.WHISPER_MODEL,
+                               parallel_transcriber is not None, config.VAD_MAX_CHUNK_S, config.VAD_MIN_SILENCE_S, config.VAD_MARGIN_DB)
+    transcript = highlight_cache.get_json("transcripts", transcript_key)
+    if transcript is None:
+        audio = get_audio()
+        with trace.span("transcribe"):
+            result = processor.transcribe_video(audio)
+        transcript = {
+            'text': result['text'],
+            'segments': [{'start': seg['start'], 'end': seg['end'], 'text': seg['text']} for seg in result.get('segments', [])],
+        }
+        highlight_cache.put_json("transcripts", transcript_key, transcript)
+    else:
+        with trace.span("transcribe", cached=True):
+            pass
+    if 'media_s' not in trace.values and transcript['segments']:
+        trace.set('media_s', transcript['segments'][-1]['end'])
+
+    analysis_key = cache_key(transcript_key, "analysis", f"models/{config.GEMINI_MODEL}", config.HIGHLIGHT_PRESCORE, config.HIGHLIGHT_CANDIDATES,
+                             config.HIGHLIGHT_WINDOW_S, config.HIGHLIGHT_STRIDE_S, config.HIGHLIGHT_SCENES, config.CLIP_MIN_S, config.CLIP_MAX_S)
+    highlights = highlight_cache.get_json("analyses", analysis_key)
+    if highlights is None:
+        audio = get_audio() if config.HIGHLIGHT_PRESCORE else None
+        with trace.span("analyze"):
+            highlights = processor.analyze_highlights(transcript, audio=audio, video_path=video_path)
+        highlight_cache.put_json("analyses", analysis_key, highlights)
+    else:
+        with trace.span("analyze", cached=True):
+            pass
+
+    uploads_key = cache_key(media_key, "uploads", json.dumps(highlights, sort_keys=True), config.CLIP_MODE, config.CLIP_PRESET)
+    clips = highlight_cache.get_json("uploads", uploads_key)
+    if clips is None:
+        # Each clip starts uploading as soon as ffmpeg finishes it, so encode and upload overlap
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, config.UPLOAD_CONCURRENCY), thread_name_prefix="upload") as uploader:
+            uploads = {}
+            # Uploads overlap the clip span; upload_wait is only the time spent after the last clip was cut
+            with trace.span("clip"):
+                clips = processor.generate_clips(
+                    video_path, highlights, video_filename,
+                    on_clip=lambda clip_path: uploads.__setitem__(clip_path, uploader.submit(timed_upload, clip_path)),
+                )
+            uploaded = True
+            upload_seconds = 0.0
+            with trace.span("upload_wait"):
+                results = [uploads[clip['path']].result() for clip in clips]
+            for clip, (clip_url, seconds) in zip(clips, results):
+                upload_seconds += seconds
+                clip['upload_seconds'] = f"{seconds:.2f}"
+                if clip_url:
+                    clip['path'] = clip_url
+                else:
+                    # The local file goes away with the job workspace, so the clip is reported as failed
+                    # rather than kept on disk outside the quota
+                    clip['path'] = ""
+                    clip['error'] = "upload failed"
+                    uploaded = False
+        print(f"Generated and uploaded {len(clips)} clips in {time.perf_counter() - start:.2f}s")
+        trace.set('clips', len(clips))
+        trace.set('upload_total_s', upload_seconds)
+        if uploaded:
+            highlight_cache.put_json("uploads", uploads_key, clips)
+    else:
+        with trace.span("clip", cached=True):
+            pass
+    return clips
+
+def format_clips_for_chat(clips):
+    formatted_clips = []
+    for clip in clips:
+        link = f"[Download Clip]({clip['path']})" if clip['path'] else f"Clip unavailable: {clip.get('error', 'upload failed')}"
+        formatted_clips.append(
+            f"Clip {len(formatted_clips) + 1}:\n\n"
+            f"Description: {clip['description']}\n\n"
+            f"Start Time: {clip['start']}s\n\n"
+            f"End Time: {clip['end']}s\n\n"
+            f"{link}\n\n"
+            "--------------------\n\n"
+        )
+    return formatted_clips
 
 async def handle_highlight_generate(video_url, is_chat=False):
     response = HighlightResponse(clips=[])
     if video_url:
-        processor = VideoProcessor()
-        video_path = processor.download_video(video_url)
-        transcript = processor.transcribe_video(video_path)
-        highlights = processor.analyze_highlights(transcript)
-        clips = processor.generate_clips(video_path, highlights, os.path.basename(video_path))
-
-        if is_chat == True:
-            formatted_clips=[]
-            for clip in clips:
-                clip_url = await upload_clip_to_supabase(clip['path'])
-                if clip_url:
-                    clip['path'] = clip_url
-                if is_chat == True:
-                    formatted_clips.append(
-                        f"Clip {len(formatted_clips) + 1}:\n\n"
-                        f"Description: {clip['description']}\n\n"
-                        f"Start Time: {clip['start']}s\n\n"
-                        f"End Time: {clip['end']}s\n\n"
-                        f"[Download Clip]({clip['path']})\n\n"
-                        "--------------------\n\n"
-                    )
-            response.clips=formatted_clips
-        else:
-            for clip in clips:
-                clip_url = await upload_clip_to_supabase(clip['path'])
-                if clip_url:
-                    clip['path'] = clip_url
-            response.clips=clips
+        try:
+            job = job_manager.submit(video_url)
+        except QueueFullError as e:
+            return HighlightResponse(clips=[], status="rejected", error=str(e))
+        try:
+            clips = await job.wait()
+        except Exception:
+            return HighlightResponse(clips=[], status="failed", error=job.error)
+        response.clips = format_clips_for_chat(clips) if is_chat == True else clips
 
     return response
 
+
+def is_http_url(url: str) -> bool:
+    return urlparse(url or "").scheme in ("http", "https")
+
+
 async def is_valid_video_url(video_url: str) -> bool:
+    info = await asyncio.to_thread(downloader.probe, video_url)
+    return bool(info) and info['status'] == 200 and "video" in info['content_type'].lower()
+
+
+# -------------------------------------------------------------------------
+# Jobs
+# -------------------------------------------------------------------------
+class QueueFullError(RuntimeError):
+    pass
+
+
+class HighlightJob:
+    def __init__(self, video_url):
+        self.id = uuid4().hex
+        self.video_url = video_url
+        self.status = "queued"
+        self.clips = []
+        self.error = None
+        self.trace = {}
+        self.created_at = datetime.now()
+        self.finished_at = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    async def wait(self):
+        await asyncio.shield(self.done)
+        if self.status == "failed":
+            raise RuntimeError(self.error)
+        return self.clips
+
+    def result(self) -> HighlightJobResult:
+        return HighlightJobResult(
+            job_id=self.id, status=self.status, clips=self.clips, error=self.error,
+            timings=self.trace.get('timings', {}), resources=self.trace.get('resources', {}),
+        )
+
+
+def init_job_worker():
+    """Entry point of a process-mode job worker: load this process's own Whisper model up front."""
+    try:
+        whisper_registry.get()
+    except Exception as e:
+        # The first job retries the load and reports the error on that job
+        print(f"Job worker {os.getpid()} could not preload Whisper: {e}")
+
+
+class JobManager:
+    """Bounded queue of highlight jobs drained by a thread or process pool, so handlers never block the event loop."""
+
+    def __init__(self, workers=2, queue_size=8, mode="thread", retention=500):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.mode = mode
+        self.retention = retention
+        self.jobs: "OrderedDict[str, HighlightJob]" = OrderedDict()
+        self.queue = None
+        self.executor = None
+        self.tasks = []
+
+    def start(self):
+        if self.queue is not None:
+            return
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.mode == "process":
+            # Spawned, not forked: this process already has threads (which may hold the Whisper
+            # locks) and a loaded torch runtime, neither of which survives a fork safely
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_job_worker,
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="highlight")
+        self.tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.queue, self.executor, self.tasks = None, None, []
+
+    def submit(self, video_url) -> HighlightJob:
+        self.start()
+        job = HighlightJob(video_url)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Highlight queue is full ({self.queue_size} jobs waiting), try again later")
+        self.jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id) -> Optional[HighlightJob]:
+        return self.jobs.get(job_id)
+
+    def stage_metrics(self) -> HighlightMetricsResponse:
+        """count/mean/p50/p95/max per stage, plus rtf and peak memory, over the retained finished jobs."""
+        values: Dict[str, List[float]] = {}
+        traced = [job.trace for job in self.jobs.values() if job.trace]
+        for trace in traced:
+            for name, seconds in trace['timings'].items():
+                values.setdefault(f"{name}_s", []).append(seconds)
+            for name in ('rtf', 'peak_rss_mb'):
+                if name in trace['resources']:
+                    values.setdefault(name, []).append(trace['resources'][name])
+
+        stages = {}
+        for name, samples in values.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                'count': float(len(ordered)),
+                'mean': sum(ordered) / len(ordered),
+                'p50': ordered[int(round(0.50 * (len(ordered) - 1)))],
+                'p95': ordered[int(round(0.95 * (len(ordered) - 1)))],
+                'max': ordered[-1],
+            }
+        return HighlightMetricsResponse(jobs=len(traced), stages=stages)
+
+    def _evict(self):
+        # Forget the oldest finished jobs once we hold more than the retention limit
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.retention:
+                break
+            if self.jobs[job_id].done.done():
+                del self.jobs[job_id]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            try:
+                job.clips, job.trace = await loop.run_in_executor(self.executor, traced_generate_highlights, job.video_url)
+                job.status = "done"
+                print(f"Job {job.id} stage timings: {job.trace['timings']}")
+            except Exception as e:
+                traceback.print_exc()
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.now()
+                if not job.done.done():
+                    job.done.set_result(None)
+                self.queue.task_done()
+
+
+job_manager = JobManager(
+    workers=config.HIGHLIGHT_WORKERS,
+    queue_size=config.HIGHLIGHT_QUEUE_SIZE,
+    mode=config.HIGHLIGHT_WORKER_MODE,
+    retention=config.HIGHLIGHT_JOB_RETENTION,
+)
+
+
+# -------------------------------------------------------------------------
+# Live Streams
+# -------------------------------------------------------------------------
+LIVE_SCORE_PROMPT = 'Also give each highlight a "score" from 1 to 10 for how highlight-worthy it is.'
+
+def media_duration(path):
+    output = subprocess.run(
+        [ffprobe_binary(), "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True,
+    ).stdout.strip()
     try:
-        response = requests.head(video_url, allow_redirects=True)
-        if response.status_code == 200 and "video" in response.headers.get("Content-Type", "").lower():
+        return float(output)
+    except ValueError:
+        return 0.0
+
+
+class HLSFollower:
+    """Polls an HLS playlist and downloads each new media segment once, in order.
+
+    Every poll returns the new pieces as dicts with the local 'path', the 'start' and
+    'duration' on the stream timeline, and 'offset' None (the whole file is the piece).
+    """
+
+    def __init__(self, playlist_url, workdir, live_edge_segments=3):
+        self.playlist_url = playlist_url
+        self.workdir = workdir
+        self.live_edge_segments = live_edge_segments
+        self.session = requests.Session()
+        self.next_sequence = None
+        self.position = 0.0
+        self.target_duration = 2.0
+        self.ended = False
+
+    def fetch_playlist(self):
+        response = self.session.get(self.playlist_url, timeout=10)
+        response.raise_for_status()
+        lines = [line.strip() for line in response.text.splitlines() if line.strip()]
+        # A master playlist lists variants; follow the first one from then on
+        for i, line in enumerate(lines):
+            if line.startswith("#EXT-X-STREAM-INF") and i + 1 < len(lines):
+                self.playlist_url = urljoin(self.playlist_url, lines[i + 1])
+                return self.fetch_playlist()
+        return lines
+
+    def poll(self):
+        sequence, duration, entries = 0, None, []
+        for line in self.fetch_playlist():
+            if line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+                sequence = int(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-TARGETDURATION:"):
+                self.target_duration = float(line.split(":", 1)[1])
+            elif line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+            elif line.startswith("#EXT-X-ENDLIST"):
+                self.ended = True
+            elif not line.startswith("#"):
+                entries.append((sequence, urljoin(self.playlist_url, line), duration or self.target_duration))
+                sequence, duration = sequence + 1, None
+
+        if self.next_sequence is None and entries:
+            # Join a running broadcast at the live edge instead of replaying its whole DVR window
+            first = entries[0] if self.ended else entries[-min(len(entries), self.live_edge_segments)]
+            self.next_sequence = first[0]
+
+        pieces = []
+        for sequence, url, duration in entries:
+            if sequence < self.next_sequence:
+                continue
+            ext = os.path.splitext(urlparse(url).path)[1] or ".ts"
+            path = os.path.join(self.workdir, f"segment_{sequence}{ext}")
+            with self.session.get(url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                with open(path, "wb") as file:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        file.write(chunk)
+            pieces.append({'path': path, 'offset': None, 'start': self.position, 'duration': duration, 'owned': True})
+            self.position += duration
+            self.next_sequence = sequence + 1
+        return pieces
+
+
+class GrowingFileFollower:
+    """Treats a local file that is still being written as a live source, for testing without an HLS origin.
+
+    Pieces are fixed-length ranges of the file; the source counts as ended once it
+    stops growing for idle_polls polls. Use a streamable container (.ts, .mkv).
+    """
+
+    def __init__(self, path, chunk_s=5.0, idle_polls=5):
+        self.path = path
+        self.chunk_s = chunk_s
+        self.idle_polls = idle_polls
+        self.idle = 0
+        self.position = 0.0
+        self.ended = False
+
+    def piece(self, duration):
+        piece = {'path': self.path, 'offset': self.position, 'start': self.position, 'duration': duration, 'owned': False}
+        self.position += duration
+        return piece
+
+    def poll(self):
+        available = media_duration(self.path)
+        pieces = []
+        while available - self.position >= self.chunk_s:
+            pieces.append(self.piece(self.chunk_s))
+        self.idle = 0 if pieces else self.idle + 1
+        if self.idle >= self.idle_polls:
+            if available > self.position:
+                pieces.append(self.piece(available - self.position))
+            self.ended = True
+        return pieces
+
+
+class LiveSession:
+    """Follows one live source and emits clips for its best moments while it is still running.
+
+    Audio is transcribed in LIVE_WINDOW_S windows that overlap by LIVE_OVERLAP_S. All state is
+    bounded: media pieces and transcript segments are ring buffers covering LIVE_RETENTION_S,
+    and the best highlights so far live in a LIVE_TOP_K min-heap. A highlight is cut, uploaded
+    and emitted as soon as it makes it into the heap.
+    """
+
+    def __init__(self, stream_url, on_clip=None, on_end=None, max_duration=None):
+        self.id = uuid4().hex
+        self.stream_url = stream_url
+        self.on_clip = on_clip
+        self.on_end = on_end
+        self.max_duration = max_duration
+        self.status = "starting"
+        self.error = None
+        self.created_at = datetime.now()
+        self.finished_at = None
+
+        self.pieces = deque()
+        self.segments = deque()
+        self.heap = []
+        self.counter = itertools.count()
+        self.clips = deque(maxlen=max(1, config.LIVE_TOP_K) * 4)
+        self.emitted = 0
+        self.transcribed_until = 0.0
+        self.pending = 0.0
+
+        self.stop_event = threading.Event()
+        self.thread = None
+        os.makedirs(config.LIVE_DIR, exist_ok=True)
+        self.workdir = tempfile.mkdtemp(prefix=f"live_{self.id[:8]}_", dir=config.LIVE_DIR)
+
+    @property
+    def active(self):
+        return self.finished_at is None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=f"live-{self.id[:8]}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def clips_since(self, cursor):
+        """Clips emitted after cursor and the new cursor; clips older than the history are skipped."""
+        first = self.emitted - len(self.clips)
+        return list(self.clips)[max(0, cursor - first):], self.emitted
+
+    def stream_position(self):
+        return self.pieces[-1]['start'] + self.pieces[-1]['duration'] if self.pieces else 0.0
+
+    def run(self):
+        try:
+            processor = VideoProcessor(clips_folder=os.path.join(self.workdir, "clips"))
+            if config.LIVE_ALLOW_LOCAL_FILES and os.path.isfile(self.stream_url):
+                follower = GrowingFileFollower(self.stream_url, config.LIVE_FILE_CHUNK_S, config.LIVE_FILE_IDLE_POLLS)
+            else:
+                follower = HLSFollower(self.stream_url, self.workdir)
+            self.status = "running"
+            print(f"Live session {self.id} following {self.stream_url}")
+
+            while not self.stop_event.is_set():
+                try:
+                    pieces = follower.poll()
+                except requests.RequestException as e:
+                    print(f"Live session {self.id}: playlist poll failed: {e}")
+                    pieces = []
+                for piece in pieces:
+                    piece['audio'] = processor.load_audio(piece['path'], start=piece['offset'],
+                                                          duration=piece['duration'] if piece['offset'] is not None else None)
+                    self.pieces.append(piece)
+                    self.pending += piece['duration']
+
+                finished = follower.ended or bool(self.max_duration and self.stream_position() >= self.max_duration)
+                if self.pending >= config.LIVE_WINDOW_S - config.LIVE_OVERLAP_S or (finished and self.pending > 0):
+                    self.process_window(processor, final=finished)
+                    self.pending = 0.0
+                    self.prune()
+                if finished:
+                    break
+                if not pieces:
+                    self.stop_event.wait(config.LIVE_POLL_S)
+            self.status = "stopped" if self.stop_event.is_set() else "done"
+        except Exception as e:
+            traceback.print_exc()
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now()
+            self.pieces.clear()
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            print(f"Live session {self.id} {self.status}, {self.emitted} clips emitted")
+            if self.on_end:
+                self.on_end(self)
+
+    def window_audio(self, start, end):
+        pieces = [p for p in self.pieces if p['start'] + p['duration'] > start and p['start'] < end]
+        audio = np.concatenate([np.asarray(p['audio'], dtype=np.float32) for p in pieces])
+        offset = int((start - pieces[0]['start']) * SAMPLE_RATE)
+        return audio[offset:offset + int((end - start) * SAMPLE_RATE)]
+
+    def process_window(self, processor, final=False):
+        end = self.stream_position()
+        start = max(self.pieces[0]['start'], end - config.LIVE_WINDOW_S)
+        audio = self.window_audio(start, end)
+        if parallel_transcriber:
+            result = parallel_transcriber.transcribe(audio, model=processor.transcription_model)
+        else:
+            result = processor.transcription_model.transcribe(audio)
+
+        # Segments in the trailing half of the overlap may be cut mid-utterance, so they are left
+        # for the next window, which re-transcribes that span with more context
+        stable_until = end if final else end - config.LIVE_OVERLAP_S / 2
+        for seg in result.get('segments', []):
+            seg_start, seg_end = start + seg['start'], start + seg['end']
+            if seg_start >= self.transcribed_until and seg_end <= stable_until:
+                self.segments.append({'start': seg_start, 'end': seg_end, 'text': seg['text']})
+                self.transcribed_until = seg_end
+
+        segments = [seg for seg in self.segments if seg['end'] > start]
+        candidates = candidate_windows(
+            [dict(seg, start=seg['start'] - start, end=seg['end'] - start) for seg in segments],
+            end - start,
+            loudness=loudness_per_second(audio),
+            window=config.LIVE_CANDIDATE_WINDOW_S,
+            stride=config.LIVE_CANDIDATE_STRIDE_S,
+            top_k=config.LIVE_CANDIDATES,
+        )
+        for candidate in candidates:
+            candidate['start'] += start
+            candidate['end'] += start
+            candidate['segments'] = [seg for seg in segments if seg['end'] > candidate['start'] and seg['start'] < candidate['end']]
+
+        for highlight in self.pick_highlights(candidates):
+            if highlight['score'] >= config.LIVE_MIN_SCORE and self.offer(highlight):
+                self.emit(processor, highlight)
+
+    def pick_highlights(self, candidates):
+        if not candidates:
+            return []
+        if config.LIVE_USE_LLM:
+            prompt = build_prompt(candidates, max_highlights=1, min_length=config.CLIP_MIN_S, max_length=config.CLIP_MAX_S)
+            try:
+                response = get_gemini_model().generate_content(prompt + "\n" + LIVE_SCORE_PROMPT,
+                                                         generation_config={"response_mime_type": "application/json"})
+                highlights = parse_highlights_json(response.text, candidates, max_highlights=1,
+                                                   min_length=config.CLIP_MIN_S, max_length=config.CLIP_MAX_S)
+                for highlight in highlights:
+                    highlight['score'] = min(10.0, max(1.0, highlight.get('score', 5.0)))
+                return highlights
+            except Exception as e:
+                print(f"Live session {self.id}: Gemini analysis failed, using local scores: {e}")
+        # Without the LLM the local score, mapped onto the LLM's 1-10 scale so both rank in the
+        # same top-K heap, picks the moment and the transcript describes it
+        return [{
+            'start': c['start'],
+            'end': min(c['end'], c['start'] + config.CLIP_MAX_S),
+            'description': " ".join(seg['text'].strip() for seg in c['segments'])[:200],
+            'score': float(scaled_score(c['score'])),
+        } for c in candidates[:1]]
+
+    def offer(self, highlight):
+        """Push a highlight into the top-K heap and report whether it made the cut."""
+        for _, _, kept in self.heap:
+            if highlight['start'] < kept['end'] and highlight['end'] > kept['start']:
+                return False
+        entry = (highlight['score'], next(self.counter), highlight)
+        if len(self.heap) < config.LIVE_TOP_K:
+            heapq.heappush(self.heap, entry)
             return True
-    except requests.RequestException:
-        pass
-    return False    
+        if entry[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+            return True
+        return False
+
+    def cut(self, start, end, clip_path):
+        pieces = [p for p in self.pieces if p['start'] + p['duration'] > start and p['start'] < end]
+        output_args = {'vcodec': 'libx264', 'preset': config.CLIP_PRESET, 'acodec': 'aac'}
+        if not pieces[0]['owned']:
+            stream = ffmpeg.input(pieces[0]['path'], ss=pieces[0]['offset'] + start - pieces[0]['start'], t=end - start)
+        else:
+            # HLS segments are joined with the concat demuxer and trimmed on the output side
+            list_path = clip_path + ".txt"
+            with open(list_path, "w") as file:
+                file.writelines(f"file '{os.path.abspath(p['path'])}'\n" for p in pieces)
+            stream = ffmpeg.input(list_path, f='concat', safe=0)
+            output_args.update(ss=start - pieces[0]['start'], t=end - start)
+        stream.output(clip_path, **output_args).overwrite_output().run(cmd=config.FFMPEG_PATH or "ffmpeg", quiet=True)
+
+    def emit(self, processor, highlight):
+        clip_path = os.path.join(processor.clips_folder, f"live_{self.id[:8]}_{highlight['start']:.0f}.mp4")
+        try:
+            self.cut(highlight['start'], highlight['end'], clip_path)
+        except ffmpeg.Error as e:
+            print(f"Live session {self.id}: failed to cut clip: {e.stderr.decode(errors='ignore')[-300:] if e.stderr else e}")
+            return
+        clip_url = upload_clip(clip_path)
+        os.remove(clip_path)
+        if not clip_url:
+            return
+        clip = {
+            'path': clip_url,
+            'start': f"{highlight['start']:.1f}",
+            'end': f"{highlight['end']:.1f}",
+            'description': highlight['description'],
+            'score': f"{highlight['score']:.2f}",
+        }
+        self.clips.append(clip)
+        self.emitted += 1
+        print(f"Live session {self.id}: clip {self.emitted} at {clip['start']}s (score {clip['score']})")
+        if self.on_clip:
+            self.on_clip(self, clip)
+
+    def prune(self):
+        horizon = self.stream_position() - max(config.LIVE_RETENTION_S, config.LIVE_WINDOW_S)
+        while self.pieces and self.pieces[0]['start'] + self.pieces[0]['duration'] < horizon:
+            piece = self.pieces.popleft()
+            if piece['owned']:
+                try:
+                    os.remove(piece['path'])
+                except FileNotFoundError:
+                    pass
+        while self.segments and self.segments[0]['end'] < horizon:
+            self.segments.popleft()
+
+    def result(self, cursor=0) -> LiveHighlightClips:
+        clips, cursor = self.clips_since(cursor)
+        return LiveHighlightClips(session_id=self.id, status=self.status, clips=clips, cursor=cursor, error=self.error)
+
+
+class LiveManager:
+    """Runs live sessions on their own threads, up to LIVE_MAX_SESSIONS at a time."""
+
+    def __init__(self, max_sessions=2, retention=50):
+        self.max_sessions = max(1, max_sessions)
+        self.retention = retention
+        self.sessions: "OrderedDict[str, LiveSession]" = OrderedDict()
+
+    def start(self, stream_url, on_clip=None, on_end=None, max_duration=None) -> LiveSession:
+        if sum(session.active for session in self.sessions.values()) >= self.max_sessions:
+            raise QueueFullError(f"{self.max_sessions} live sessions are already running, try again later")
+        # Request senders are remote, so host files are only followed when explicitly enabled for testing
+        if not is_http_url(stream_url) and not (config.LIVE_ALLOW_LOCAL_FILES and os.path.isfile(stream_url)):
+            raise ValueError("stream_url must be an http(s) URL")
+        session = LiveSession(stream_url, on_clip=on_clip, on_end=on_end, max_duration=max_duration)
+        self.sessions[session.id] = session
+        session.start()
+        for session_id in list(self.sessions):
+            if len(self.sessions) <= self.retention:
+                break
+            if not self.sessions[session_id].active:
+                del self.sessions[session_id]
+        return session
+
+    def get(self, session_id) -> Optional[LiveSession]:
+        return self.sessions.get(session_id)
+
+    def stop_all(self):
+        for session in self.sessions.values():
+            session.stop()
 
 
+live_manager = LiveManager(max_sessions=config.LIVE_MAX_SESSIONS)
+
+
+
+# -------------------------------------------------------------------------
+# Readiness
+# -------------------------------------------------------------------------
+def check_ffmpeg():
+    for binary in (config.FFMPEG_PATH or "ffmpeg", ffprobe_binary()):
+        subprocess.run([binary, "-version"], capture_output=True, check=True, timeout=10)
+
+def check_storage():
+    get_supabase().storage.get_bucket(config.SUPABASE_BUCKET_HIGHLIGHT_NAME)
+
+
+class Readiness:
+    """Warms heavy dependencies on a background thread so the agent can serve /health immediately.
+
+    Times are seconds since this module finished its imports: serving_s when the agent is
+    up, ready_s when every required check has passed.
+    """
+
+    def __init__(self):
+        self.checks: Dict[str, bool] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+        self.serving_s = None
+        self.ready_s = None
+        self.thread = None
+
+    def required(self):
+        return ("ffmpeg", "gemini", "storage", "model") if config.WHISPER_PRELOAD else ("ffmpeg", "gemini", "storage")
+
+    def check(self, name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+            self.checks[name] = True
+            self.errors.pop(name, None)
+        except Exception as e:
+            self.checks[name] = False
+            self.errors[name] = str(e) or type(e).__name__
+        self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def warm_up(self):
+        # Cheapest first, so a missing ffmpeg or bad storage credentials show up before the model finishes loading
+        self.check("ffmpeg", check_ffmpeg)
+        self.check("gemini", get_gemini_model)
+        self.check("storage", check_storage)
+        if config.WHISPER_PRELOAD:
+            self.check("model", whisper_registry.get)
+        if self.ready:
+            self.ready_s = round(time.perf_counter() - MODULE_LOADED_AT, 3)
+            print(f"[highlight] Ready in {self.ready_s:.2f}s ({', '.join(f'{k} {v:.2f}s' for k, v in self.timings.items())})")
+        else:
+            print(f"[highlight] Warm-up finished with failing checks: {self.errors}")
+
+    def start(self):
+        self.serving_s = round(time.perf_counter() - MODULE_LOADED_AT, 3)
+        if self.serving_s > config.STARTUP_BUDGET_S:
+            print(f"[highlight] Startup took {self.serving_s:.2f}s, over the {config.STARTUP_BUDGET_S:.2f}s budget")
+        self.thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        self.thread.start()
+
+    @property
+    def ready(self):
+        return all(self.checks.get(name) for name in self.required())
+
+    def response(self) -> HealthResponse:
+        checks = dict(self.checks, model=bool(whisper_registry.models))
+        if self.ready:
+            status = "ready"
+        elif self.thread is None or self.thread.is_alive():
+            status = "starting"
+        else:
+            status = "degraded"
+        return HealthResponse(
+            status=status,
+            ready=self.ready,
+            checks=checks,
+            errors=self.errors,
+            timings_s=self.timings,
+            serving_s=self.serving_s,
+            ready_s=self.ready_s,
+        )
+
+
+readiness = Readiness()
+
 
 # -------------------------------------------------------------------------
 # Agent Creation
@@ -228,19 +1604,107 @@ def create_video_processing_agent(seed: str) -> Agent:
         readme_path=README_PATH,
     )
 
-    try:
-        fund_agent_if_low(agent.wallet.address())
-    except Exception:
-        print("fund_agent_if_low failed or not available in this environment")
+    def fund_agent():
+        try:
+            fund_agent_if_low(agent.wallet.address())
+        except Exception:
+            print("fund_agent_if_low failed or not available in this environment")
 
     highlight_protocol = Protocol("HighlightProcessing")
 
+    @agent.on_event("startup")
+    async def start_job_workers(ctx: Context):
+        workspace.clean_stale()
+        job_manager.start()
+        ctx.logger.info(f"[highlight] {job_manager.workers} {job_manager.mode} workers, queue size {job_manager.queue_size}")
+
+    # Startup handlers run before the agent binds its port, so anything slow (funding, model
+    # loading, client imports) is started here but never awaited
+    @agent.on_event("startup")
+    async def start_warm_up(ctx: Context):
+        asyncio.get_running_loop().run_in_executor(None, fund_agent)
+        readiness.start()
+        ctx.logger.info(f"[highlight] Serving after {readiness.serving_s:.2f}s, warming up dependencies in the background")
+
+    @agent.on_event("shutdown")
+    async def stop_job_workers(ctx: Context):
+        await job_manager.stop()
+        live_manager.stop_all()
+        if parallel_transcriber:
+            parallel_transcriber.shutdown()
+
+    # The loop only keeps weak references to tasks, so pending deliveries are held here
+    delivery_tasks = set()
+
+    def schedule_delivery(ctx: Context, sender: str, job: HighlightJob, is_chat=False):
+        task = asyncio.ensure_future(deliver_when_done(ctx, sender, job, is_chat))
+        delivery_tasks.add(task)
+        task.add_done_callback(delivery_tasks.discard)
+
+    async def deliver_when_done(ctx: Context, sender: str, job: HighlightJob, is_chat=False):
+        try:
+            clips = await job.wait()
+        except Exception as e:
+            ctx.logger.error(f"[highlight] Job {job.id} failed: {e}")
+            clips = []
+        if is_chat:
+            text = "\n".join(format_clips_for_chat(clips)) if job.status == "done" else f"Highlight job failed: {job.error}"
+            await ctx.send(sender, ChatMessage(
+                timestamp=datetime.utcnow(),
+                msg_id=uuid4(),
+                content=[TextContent(type="text", text=text)],
+            ))
+        else:
+            await ctx.send(sender, HighlightResponse(clips=clips, status=job.status, error=job.error))
+
     @highlight_protocol.on_message(model=HighlightRequest, replies=HighlightResponse)
     async def handle_video_processing(ctx: Context, sender: str, msg: HighlightRequest):
         video_url = msg.video_url
         ctx.logger.info(f"[highlight] Received highlight request for text: '{video_url}'")
-        response = await handle_highlight_generate(video_url)
-        await ctx.send(sender, response)
+        try:
+            job = job_manager.submit(video_url)
+        except QueueFullError as e:
+            ctx.logger.warning(f"[highlight] Rejected request: {e}")
+            await ctx.send(sender, HighlightResponse(clips=[], status="rejected", error=str(e)))
+            return
+        schedule_delivery(ctx, sender, job)
+
+    @highlight_protocol.on_message(model=HighlightJobRequest, replies=HighlightJobResult)
+    async def handle_job_status(ctx: Context, sender: str, msg: HighlightJobRequest):
+        job = job_manager.get(msg.job_id)
+        await ctx.send(sender, job.result() if job else HighlightJobResult(job_id=msg.job_id, status="unknown"))
+
+    @highlight_protocol.on_message(model=LiveHighlightRequest, replies={LiveHighlightResponse, LiveHighlightClips})
+    async def handle_live_start(ctx: Context, sender: str, msg: LiveHighlightRequest):
+        ctx.logger.info(f"[highlight] Received live highlight request for '{msg.stream_url}'")
+        loop = asyncio.get_running_loop()
+
+        # Sessions run on their own threads, so clips are handed back to the event loop to be sent
+        def on_clip(session, clip):
+            asyncio.run_coroutine_threadsafe(ctx.send(sender, LiveHighlightClips(
+                session_id=session.id, status=session.status, clips=[clip], cursor=session.emitted,
+            )), loop)
+
+        def on_end(session):
+            asyncio.run_coroutine_threadsafe(ctx.send(sender, session.result(session.emitted)), loop)
+
+        try:
+            session = live_manager.start(msg.stream_url, on_clip=on_clip, on_end=on_end, max_duration=msg.max_duration_s)
+        except (QueueFullError, ValueError) as e:
+            await ctx.send(sender, LiveHighlightResponse(session_id="", status="rejected", error=str(e)))
+            return
+        await ctx.send(sender, LiveHighlightResponse(session_id=session.id, status=session.status))
+
+    @highlight_protocol.on_message(model=LiveHighlightStop, replies=LiveHighlightResponse)
+    async def handle_live_stop(ctx: Context, sender: str, msg: LiveHighlightStop):
+        session = live_manager.get(msg.session_id)
+        if session:
+            session.stop()
+        await ctx.send(sender, LiveHighlightResponse(session_id=msg.session_id, status=session.status if session else "unknown"))
+
+    @agent.on_rest_get("/health", HealthResponse)
+    async def rest_health(ctx: Context) -> HealthResponse:
+        return readiness.response()
 
     @agent.on_rest_post("/generate_highlight", HighlightRequest, HighlightResponse)
     async def rest_generate_highlights(ctx: Context, req: HighlightRequest) -> HighlightResponse:
@@ -248,6 +1712,57 @@ def create_video_processing_agent(seed: str) -> Agent:
         response = await handle_highlight_generate(video_url)
         return response
 
+    @agent.on_rest_post("/highlight/jobs", HighlightRequest, HighlightJobResponse)
+    async def rest_submit_job(ctx: Context, req: HighlightRequest) -> HighlightJobResponse:
+        try:
+            job = job_manager.submit(req.video_url)
+        except QueueFullError as e:
+            return HighlightJobResponse(job_id="", status="rejected", error=str(e))
+        return HighlightJobResponse(job_id=job.id, status=job.status)
+
+    @agent.on_rest_post("/highlight/jobs/status", HighlightJobRequest, HighlightJobResponse)
+    async def rest_job_status(ctx: Context, req: HighlightJobRequest) -> HighlightJobResponse:
+        job = job_manager.get(req.job_id)
+        if not job:
+            return HighlightJobResponse(job_id=req.job_id, status="unknown")
+        return HighlightJobResponse(job_id=job.id, status=job.status, error=job.error)
+
+    @agent.on_rest_post("/highlight/jobs/result", HighlightJobRequest, HighlightJobResult)
+    async def rest_job_result(ctx: Context, req: HighlightJobRequest) -> HighlightJobResult:
+        job = job_manager.get(req.job_id)
+        return job.result() if job else HighlightJobResult(job_id=req.job_id, status="unknown")
+
+    @agent.on_rest_get("/highlight/metrics", HighlightMetricsResponse)
+    async def rest_stage_metrics(ctx: Context) -> HighlightMetricsResponse:
+        return job_manager.stage_metrics()
+
+    @agent.on_rest_post("/highlight/live", LiveHighlightRequest, LiveHighlightResponse)
+    async def rest_live_start(ctx: Context, req: LiveHighlightRequest) -> LiveHighlightResponse:
+        try:
+            session = live_manager.start(req.stream_url, max_duration=req.max_duration_s)
+        except (QueueFullError, ValueError) as e:
+            return LiveHighlightResponse(session_id="", status="rejected", error=str(e))
+        return LiveHighlightResponse(session_id=session.id, status=session.status)
+
+    @agent.on_rest_post("/highlight/live/clips", LiveClipsRequest, LiveHighlightClips)
+    async def rest_live_clips(ctx: Context, req: LiveClipsRequest) -> LiveHighlightClips:
+        # Long poll: hold the request up to wait_s until a clip past the cursor shows up
+        session = live_manager.get(req.session_id)
+        if not session:
+            return LiveHighlightClips(session_id=req.session_id, status="unknown", cursor=req.cursor)
+        deadline = time.monotonic() + min(max(req.wait_s, 0.0), 60.0)
+        while session.emitted <= req.cursor and session.active and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        return session.result(req.cursor)
+
+    @agent.on_rest_post("/highlight/live/stop", LiveHighlightStop, LiveHighlightResponse)
+    async def rest_live_stop(ctx: Context, req: LiveHighlightStop) -> LiveHighlightResponse:
+        session = live_manager.get(req.session_id)
+        if not session:
+            return LiveHighlightResponse(session_id=req.session_id, status="unknown")
+        session.stop()
+        return LiveHighlightResponse(session_id=session.id, status=session.status, error=session.error)
+
 
     chat_proto = Protocol(spec=chat_protocol_spec)
 
@@ -261,12 +1776,18 @@ def create_video_processing_agent(seed: str) -> Agent:
                 user_text = item.text
                 break
 
-        response = await handle_highlight_generate(user_text,is_chat=True)
+        try:
+            job = job_manager.submit(user_text) if user_text else None
+            reply = f"Highlight job {job.id} queued, clips will follow when it finishes." if job else "Please send a video URL."
+        except QueueFullError as e:
+            job, reply = None, str(e)
         await ctx.send(sender, ChatMessage(
             timestamp=datetime.utcnow(),
             msg_id=uuid4(),
-            content=[TextContent(type="text", text="\n".join(response.clips))],
+            content=[TextContent(type="text", text=reply)],
         ))
+        if job:
+            schedule_delivery(ctx, sender, job, is_chat=True)
 
     @chat_proto.on_message(ChatAcknowledgement)
     async def handle_chat_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
@@ -0,0 +1,165 @@
+import re
+import json
+import subprocess
+import numpy as np
+from typing import Dict, List, Optional
+
+from transcription import SAMPLE_RATE, frame_energies
+
+HYPE_WORDS = (
+    "oh my god", "omg", "no way", "let's go", "lets go", "insane", "clutch", "wow", "holy",
+    "what the", "unbelievable", "huge", "gg", "crazy", "yes", "win", "won", "dead", "kill",
+)
+DEFAULT_WEIGHTS = {'loudness': 1.0, 'speech_rate': 0.5, 'scenes': 0.5, 'keywords': 1.0}
+SCENE_TIME_RE = re.compile(r"pts_time:([0-9.]+)")
+
+
+
+# -------------------------------------------------------------------------
+# Signals
+# -------------------------------------------------------------------------
+def loudness_per_second(audio, sample_rate=SAMPLE_RATE) -> np.ndarray:
+    return frame_energies(audio, sample_rate)
+
+
+def scene_changes(video_path, ffmpeg_cmd="ffmpeg", threshold=0.3) -> List[float]:
+    """Scene cut times in seconds, scored on keyframes only so the video is never fully decoded."""
+    cmd = [
+        ffmpeg_cmd, "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", video_path,
+        "-an", "-vf", f"scale=160:-2,select='gt(scene,{threshold})',showinfo", "-f", "null", "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return [float(match) for match in SCENE_TIME_RE.findall(result.stderr)]
+
+
+def keyword_hits(text: str) -> int:
+    lowered = text.lower()
+    return sum(lowered.count(word) for word in HYPE_WORDS) + text.count("!")
+
+
+def zscores(values: List[float]) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+
+
+# -------------------------------------------------------------------------
+# Candidate Windows
+# -------------------------------------------------------------------------
+def candidate_windows(segments: List[Dict], duration: float, loudness: Optional[np.ndarray] = None,
+                      scene_times: Optional[List[float]] = None, window=30.0, stride=10.0, top_k=8,
+                      weights=None) -> List[Dict]:
+    """Score sliding windows on local signals and return the top_k non-overlapping ones, best first."""
+    weights = weights or DEFAULT_WEIGHTS
+    if duration <= 0 or not segments:
+        return []
+
+    starts = np.arange(0.0, max(duration - window, 0.0) + stride, stride)
+    baseline = float(np.median(loudness)) if loudness is not None and len(loudness) else 0.0
+    windows, signals = [], {name: [] for name in DEFAULT_WEIGHTS}
+    for start in starts:
+        end = min(start + window, duration)
+        inside = [seg for seg in segments if seg['end'] > start and seg['start'] < end]
+        text = " ".join(seg['text'].strip() for seg in inside)
+        words = len(text.split())
+
+        if loudness is not None and len(loudness):
+            chunk = loudness[int(start):max(int(start) + 1, int(end))]
+            peak = float(np.mean(np.sort(chunk)[-3:])) - baseline if len(chunk) else 0.0
+        else:
+            peak = 0.0
+        signals['loudness'].append(peak)
+        signals['speech_rate'].append(words / max(end - start, 1e-6))
+        signals['scenes'].append(sum(1 for t in (scene_times or []) if start <= t < end))
+        signals['keywords'].append(keyword_hits(text) / max(words, 1))
+        windows.append({'start': float(start), 'end': float(end), 'segments': inside})
+
+    scores = sum(weights.get(name, 0.0) * zscores(values) for name, values in signals.items())
+    for candidate, score in zip(windows, scores):
+        candidate['score'] = float(score)
+
+    selected = []
+    for candidate in sorted(windows, key=lambda w: w['score'], reverse=True):
+        if not candidate['segments']:
+            continue
+        if all(candidate['end'] <= other['start'] or candidate['start'] >= other['end'] for other in selected):
+            selected.append(candidate)
+        if len(selected) >= top_k:
+            break
+    return selected
+
+
+def scaled_score(z: float) -> float:
+    """Map a candidate's weighted z-score onto the LLM's 1-10 scale, with an average window at 5.5."""
+    z = min(max(z, -50.0), 50.0)
+    return 1.0 + 9.0 / (1.0 + np.exp(-z))
+
+
+
+# -------------------------------------------------------------------------
+# LLM Prompt & Parsing
+# -------------------------------------------------------------------------
+def build_prompt(candidates: List[Dict], max_highlights=5, min_length=5.0, max_length=60.0) -> str:
+    lines = [
+        f"Below are candidate moments from a stream transcript, each with real timestamps in seconds. "
+        f"Pick the {max_highlights} most highlight-worthy moments. For each, choose a start and end in seconds that lie "
+        f"inside a single candidate, between {min_length:.0f} and {max_length:.0f} seconds long, covering the whole moment, "
+        f"and write a brief, engaging description.",
+        'Respond with JSON only: [{"start": <seconds>, "end": <seconds>, "description": "<text>"}]',
+        "",
+    ]
+    for i, candidate in enumerate(candidates, 1):
+        lines.append(f"Candidate {i} ({candidate['start']:.1f}s-{candidate['end']:.1f}s):")
+        for seg in candidate['segments']:
+            lines.append(f"[{seg['start']:.1f}-{seg['end']:.1f}] {seg['text'].strip()}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def extract_json(text: str):
+    """Decode text as JSON, or else the first [...] or {...} block in it when the LLM wraps the JSON in prose."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            return decoder.raw_decode(text, match.start())[0]
+        except json.JSONDecodeError:
+            continue
+    raise error
+
+
+def parse_highlights_json(response_text: str, candidates: List[Dict], max_highlights=5,
+                          min_length=5.0, max_length=60.0) -> List[Dict]:
+    """Parse the LLM's JSON and clamp every highlight into the candidate window it falls in."""
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if "\n" in text else text
+    items = extract_json(text)
+    if isinstance(items, dict):
+        items = items.get('highlights', [])
+
+    highlights = []
+    for item in items:
+        try:
+            start, end = float(item['start']), float(item['end'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        window = next((c for c in candidates if c['start'] <= start < c['end']), None)
+        if window is None:
+            continue
+        start = max(start, window['start'])
+        end = min(max(end, start + min_length), start + max_length, window['end'])
+        if end <= start:
+            continue
+        highlight = {'start': start, 'end': end, 'description': str(item.get('description', '')).strip()}
+        if isinstance(item.get('score'), (int, float)):
+            highlight['score'] = float(item['score'])
+        highlights.append(highlight)
+        if len(highlights) >= max_highlights:
+            break
+    return highlights
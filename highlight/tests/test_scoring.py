@@ -0,0 +1,34 @@
+import pytest
+
+from scoring import extract_json, parse_highlights_json
+
+
+CANDIDATES = [{'start': 0.0, 'end': 60.0}, {'start': 100.0, 'end': 160.0}]
+
+
+def test_extract_json_reads_plain_json():
+    assert extract_json('[{"start": 1}]') == [{'start': 1}]
+
+
+def test_extract_json_skips_prose_and_brackets_around_the_block():
+    text = 'Here are the [best] moments:\n[{"start": 10, "end": 30}]\nHope that helps {ok}'
+    assert extract_json(text) == [{'start': 10, 'end': 30}]
+
+
+def test_extract_json_raises_without_a_block():
+    with pytest.raises(ValueError):
+        extract_json("No highlights in this one, sorry.")
+
+
+def test_parse_highlights_json_accepts_prose_wrapped_json():
+    text = 'Sure!\n{"highlights": [{"start": 105, "end": 120, "description": "clutch", "score": 8}]}'
+    assert parse_highlights_json(text, CANDIDATES) == [
+        {'start': 105.0, 'end': 120.0, 'description': 'clutch', 'score': 8.0},
+    ]
+
+
+def test_parse_highlights_json_clamps_into_the_candidate():
+    text = '```json\n[{"start": 50, "end": 90, "description": "a"}, {"start": 70, "end": 80}]\n```'
+    assert parse_highlights_json(text, CANDIDATES, min_length=5, max_length=60) == [
+        {'start': 50.0, 'end': 60.0, 'description': 'a'},
+    ]
@@ -0,0 +1,122 @@
+import os
+import time
+import resource
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No procfs (e.g. macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+def cpu_seconds():
+    """(this process, waited-for child processes such as ffmpeg) CPU seconds, user plus system."""
+    times = os.times()
+    return times.user + times.system, times.children_user + times.children_system
+
+
+
+# -------------------------------------------------------------------------
+# Job Trace
+# -------------------------------------------------------------------------
+class JobTrace:
+    """Per-stage wall time, CPU time and peak memory for one highlight job.
+
+    Memory is sampled on a background thread every sample_interval seconds while the
+    trace is open. CPU and memory are process-wide, so with several jobs running in one
+    process they include the other jobs' work; transcription in the worker pool's
+    processes is not counted as child CPU until those processes exit.
+    """
+
+    def __init__(self, sample_interval=0.5):
+        self.sample_interval = sample_interval
+        self.spans: List[Dict] = []
+        self.values: Dict[str, float] = {}
+        self.samples: List[tuple] = []
+        self.started = None
+        self.finished = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.samples.append((self.started, rss_mb()))
+        self.thread = threading.Thread(target=self._sample, name="trace-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.finished = time.perf_counter()
+        self.samples.append((self.finished, rss_mb()))
+        return False
+
+    def _sample(self):
+        while not self.stop_event.wait(self.sample_interval):
+            self.samples.append((time.perf_counter(), rss_mb()))
+
+    def peak_rss(self, since, until):
+        inside = [rss for t, rss in self.samples if since <= t <= until]
+        return max(inside, default=rss_mb())
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        cpu, child_cpu = cpu_seconds()
+        self.samples.append((start, rss_mb()))
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.samples.append((end, rss_mb()))
+            cpu_end, child_cpu_end = cpu_seconds()
+            self.spans.append(dict(
+                attrs,
+                name=name,
+                seconds=end - start,
+                cpu_s=cpu_end - cpu,
+                child_cpu_s=child_cpu_end - child_cpu,
+                peak_rss_mb=self.peak_rss(start, end),
+            ))
+
+    def set(self, name, value):
+        self.values[name] = float(value)
+
+    def timings(self) -> Dict[str, float]:
+        """Seconds per stage (repeated spans are summed) plus the job's total wall time."""
+        timings = {}
+        for span in self.spans:
+            timings[span['name']] = timings.get(span['name'], 0.0) + round(span['seconds'], 4)
+        if self.started is not None:
+            timings['total'] = round((self.finished or time.perf_counter()) - self.started, 4)
+        return timings
+
+    def resources(self) -> Dict[str, float]:
+        resources = dict(self.values)
+        for span in self.spans:
+            for key in ('cpu_s', 'child_cpu_s'):
+                name = f"{span['name']}_{key}"
+                resources[name] = round(resources.get(name, 0.0) + span[key], 4)
+            name = f"{span['name']}_peak_rss_mb"
+            resources[name] = round(max(resources.get(name, 0.0), span['peak_rss_mb']), 1)
+            if span.get('cached'):
+                resources[f"{span['name']}_cached"] = 1.0
+        if self.samples:
+            resources['peak_rss_mb'] = round(max(rss for _, rss in self.samples), 1)
+        total = self.timings().get('total')
+        if total and self.values.get('media_s'):
+            # Real-time factor: processing seconds per second of media, below 1 is faster than real time
+            resources['rtf'] = round(total / self.values['media_s'], 4)
+        return resources
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {'timings': self.timings(), 'resources': self.resources()}
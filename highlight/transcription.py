@@ -0,0 +1,197 @@
+import os
+import threading
+import multiprocessing
+import numpy as np
+from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+SAMPLE_RATE = 16000
+
+
+
+# -------------------------------------------------------------------------
+# Whisper Models
+# -------------------------------------------------------------------------
+class TranscriptionModel:
+    """Common transcribe() interface over openai-whisper and faster-whisper (CTranslate2)."""
+
+    def __init__(self, backend, size, device="cpu", threads=0, compute_type="int8"):
+        self.backend = backend
+        self.size = size
+        self.lock = threading.Lock()
+        if backend == "faster":
+            from faster_whisper import WhisperModel
+            self.model = WhisperModel(size, device=device, compute_type=compute_type, cpu_threads=threads, num_workers=2)
+        elif backend == "openai":
+            import whisper
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            self.model = whisper.load_model(name=size, device=device)
+        else:
+            raise ValueError(f"Unknown WHISPER_BACKEND: {backend}")
+
+    def transcribe(self, audio, **kwargs) -> Dict:
+        if self.backend == "faster":
+            segments, _ = self.model.transcribe(audio, **kwargs)
+            segments = [{'start': seg.start, 'end': seg.end, 'text': seg.text} for seg in segments]
+            return {'text': "".join(seg['text'] for seg in segments), 'segments': segments}
+        # openai-whisper shares mutable decoder state, so one job transcribes at a time per model
+        with self.lock:
+            return self.model.transcribe(audio, **kwargs)
+
+
+
+# -------------------------------------------------------------------------
+# Voice Activity Detection
+# -------------------------------------------------------------------------
+def frame_energies(audio, frame, block_frames=10000) -> np.ndarray:
+    """Per-frame energy in dB, computed block by block so memmapped audio is never fully copied."""
+    n_frames = len(audio) // frame
+    energies = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, block_frames):
+        last = min(n_frames, first + block_frames)
+        block = np.asarray(audio[first * frame:last * frame], dtype=np.float32).reshape(last - first, frame)
+        energies[first:last] = 10.0 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+    return energies
+
+
+def vad_segments(audio, sample_rate=SAMPLE_RATE, frame_ms=30, margin_db=10.0, floor_db=-50.0,
+                 min_silence=0.5, min_speech=0.25, pad=0.2, max_chunk=30.0) -> List[Tuple[float, float]]:
+    """Speech regions as (start, end) seconds, split at quiet frames so no chunk exceeds max_chunk."""
+    frame = int(sample_rate * frame_ms / 1000)
+    energies = frame_energies(audio, frame)
+    if len(energies) == 0:
+        return []
+    # Adaptive threshold: a margin above the noise floor, but at least a margin below the loud
+    # frames so mostly-speech audio still passes, and never below an absolute floor
+    noise, loud = np.percentile(energies, [10, 90])
+    threshold = max(min(float(noise) + margin_db, float(loud) - margin_db), floor_db)
+    speech = energies > threshold
+    frame_s = frame / sample_rate
+
+    regions = []
+    start = None
+    for i, is_speech in enumerate(speech):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            regions.append([start, i])
+            start = None
+    if start is not None:
+        regions.append([start, len(speech)])
+
+    merged = []
+    gap = int(min_silence / frame_s)
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < gap:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+
+    chunks = []
+    max_frames = max(1, int(max_chunk / frame_s))
+    pad_frames = int(pad / frame_s)
+    for first, last in merged:
+        if (last - first) * frame_s < min_speech:
+            continue
+        first = max(0, first - pad_frames)
+        last = min(len(speech), last + pad_frames)
+        while last - first > max_frames:
+            # Cut at the quietest frame in the second half of the window
+            window = energies[first + max_frames // 2:first + max_frames]
+            cut = first + max_frames // 2 + int(np.argmin(window))
+            chunks.append((first * frame_s, cut * frame_s))
+            first = cut
+        chunks.append((first * frame_s, last * frame_s))
+    return chunks
+
+
+
+# -------------------------------------------------------------------------
+# Parallel Transcription
+# -------------------------------------------------------------------------
+worker_model = None
+
+def init_worker(model_args):
+    global worker_model
+    worker_model = TranscriptionModel(**model_args)
+
+
+def transcribe_chunk(model, offset, chunk) -> List[Dict]:
+    result = model.transcribe(chunk)
+    return [
+        {'start': offset + seg['start'], 'end': offset + seg['end'], 'text': seg['text']}
+        for seg in result.get('segments', [])
+    ]
+
+
+def transcribe_chunk_in_worker(offset, chunk) -> List[Dict]:
+    return transcribe_chunk(worker_model, offset, chunk)
+
+
+def available_memory_mb():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class ParallelTranscriber:
+    """Splits audio at silences, transcribes the speech chunks in a process pool and stitches global timestamps."""
+
+    def __init__(self, model_args, workers=1, memory_estimate_mb=1500, vad_args=None):
+        self.model_args = model_args
+        self.workers = self.worker_budget(workers, memory_estimate_mb)
+        self.vad_args = vad_args or {}
+        self.pool = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def worker_budget(workers, memory_estimate_mb):
+        """Cap workers at the CPU count and at available memory / memory_estimate_mb.
+
+        memory_estimate_mb is only used to size the pool; a worker's memory is not limited
+        once it runs (an address-space rlimit would also cap the model runtime's large virtual
+        mappings), so it should be set to the observed resident size of one loaded model.
+        """
+        workers = max(1, min(workers, os.cpu_count() or 1))
+        memory = available_memory_mb()
+        if memory and memory_estimate_mb:
+            workers = max(1, min(workers, memory // memory_estimate_mb))
+        return workers
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                # One model per worker process, loaded once and reused across jobs. Workers are
+                # spawned: the caller already has threads and a loaded model, which forking would copy
+                model_args = dict(self.model_args, threads=max(1, (os.cpu_count() or 1) // self.workers))
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker,
+                    initargs=(model_args,),
+                )
+            return self.pool
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+
+    def transcribe(self, audio, model=None, sample_rate=SAMPLE_RATE) -> Dict:
+        chunks = vad_segments(audio, sample_rate=sample_rate, **self.vad_args)
+        pieces = [(start, np.array(audio[int(start * sample_rate):int(end * sample_rate)], dtype=np.float32))
+                  for start, end in chunks]
+
+        if self.workers <= 1 and model is not None:
+            results = [transcribe_chunk(model, offset, chunk) for offset, chunk in pieces]
+        else:
+            pool = self.get_pool()
+            futures = [pool.submit(transcribe_chunk_in_worker, offset, chunk) for offset, chunk in pieces]
+            results = [future.result() for future in futures]
+
+        segments = [seg for result in results for seg in result]
+        return {'text': "".join(seg['text'] for seg in segments), 'segments': segments}
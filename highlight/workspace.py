@@ -0,0 +1,177 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class WorkspaceFullError(RuntimeError):
+    pass
+
+
+
+# -------------------------------------------------------------------------
+# Workspace
+# -------------------------------------------------------------------------
+class JobSpace:
+    """Scratch directories for one job; everything in them is deleted when the job ends."""
+
+    def __init__(self, path, scratch_path):
+        self.path = path
+        self.scratch_path = scratch_path
+
+    def dir(self, name):
+        """Directory on the workspace disk, e.g. for downloads that are moved into the cache afterwards."""
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def scratch(self, name):
+        """Directory for short-lived intermediates such as clips awaiting upload, on tmpfs when configured."""
+        path = os.path.join(self.scratch_path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class Workspace:
+    """Per-job working directories under a disk quota.
+
+    Jobs reserve the bytes they expect to write before starting; when the quota is taken they
+    wait up to wait_s for other jobs to finish and then fail with WorkspaceFullError rather than
+    filling the disk. Intermediates go to tmpfs_dir while it has tmpfs_min_free_mb to spare.
+
+    Reservations are files in each job directory, and every job holds an flock on its directory
+    for as long as it runs. The quota therefore covers every process sharing the root (worker
+    pool processes, other replicas), and only directories whose owner has died are stale.
+    Without fcntl (Windows) every job directory counts as live.
+    """
+
+    LOCK_FILE = ".lock"
+    RESERVED_FILE = ".reserved"
+
+    def __init__(self, root="workspace", max_mb=10240, tmpfs_dir=None, tmpfs_min_free_mb=512, wait_s=60.0, poll_s=0.5):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.tmpfs_dir = tmpfs_dir
+        self.tmpfs_min_free = tmpfs_min_free_mb * 1024 * 1024
+        self.wait_s = wait_s
+        self.poll_s = poll_s
+        self.condition = threading.Condition()
+        os.makedirs(self.root, exist_ok=True)
+
+    @contextmanager
+    def root_lock(self):
+        # Serializes reservations and cleanup across every process sharing the root
+        with open(os.path.join(self.root, self.LOCK_FILE), "a") as file:
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            yield
+
+    def job_paths(self, base):
+        if not os.path.isdir(base):
+            return []
+        return [os.path.join(base, name) for name in os.listdir(base) if name.startswith("job_")]
+
+    def is_live(self, path):
+        if not fcntl:
+            return True
+        try:
+            fd = os.open(os.path.join(path, self.LOCK_FILE), os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+
+    def reserved(self):
+        """Bytes reserved by the running jobs of every process sharing the root."""
+        total = 0
+        for path in self.job_paths(self.root):
+            if not self.is_live(path):
+                continue
+            try:
+                with open(os.path.join(path, self.RESERVED_FILE), "r") as file:
+                    total += int(file.read() or 0)
+            except (OSError, ValueError):
+                continue
+        return total
+
+    def clean_stale(self):
+        """Remove job directories left behind by processes that died mid-job."""
+        with self.root_lock():
+            live = set()
+            for path in self.job_paths(self.root):
+                if self.is_live(path):
+                    live.add(os.path.basename(path))
+                else:
+                    shutil.rmtree(path, ignore_errors=True)
+            # Scratch directories on tmpfs share their job directory's name
+            if self.tmpfs_dir and os.path.abspath(self.tmpfs_dir) != self.root:
+                for path in self.job_paths(self.tmpfs_dir):
+                    if os.path.basename(path) not in live:
+                        shutil.rmtree(path, ignore_errors=True)
+
+    def reserve(self, nbytes):
+        """Create a job directory holding nbytes of the quota; returns (path, lock fd)."""
+        deadline = time.monotonic() + self.wait_s
+        with self.condition:
+            while True:
+                with self.root_lock():
+                    reserved = self.reserved()
+                    # A job bigger than the whole quota may still run once it has the workspace to itself
+                    if reserved + nbytes <= self.max_bytes or reserved == 0:
+                        free = shutil.disk_usage(self.root).free
+                        if nbytes > free:
+                            raise WorkspaceFullError(f"Not enough disk space: {nbytes >> 20} MB requested, {free >> 20} MB free")
+                        path = tempfile.mkdtemp(prefix=f"job_{os.getpid()}_", dir=self.root)
+                        fd = os.open(os.path.join(path, self.LOCK_FILE), os.O_CREAT | os.O_RDWR)
+                        if fcntl:
+                            fcntl.flock(fd, fcntl.LOCK_EX)
+                        with open(os.path.join(path, self.RESERVED_FILE), "w") as file:
+                            file.write(str(nbytes))
+                        return path, fd
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WorkspaceFullError(
+                        f"Workspace quota exceeded: {nbytes >> 20} MB requested, "
+                        f"{reserved >> 20} of {self.max_bytes >> 20} MB in use"
+                    )
+                # Jobs in this process notify on release; other processes' jobs are polled
+                self.condition.wait(min(remaining, self.poll_s))
+
+    def release(self, path, fd):
+        shutil.rmtree(path, ignore_errors=True)
+        os.close(fd)
+        with self.condition:
+            self.condition.notify_all()
+
+    def scratch_root(self):
+        if self.tmpfs_dir and os.path.isdir(self.tmpfs_dir) and shutil.disk_usage(self.tmpfs_dir).free >= self.tmpfs_min_free:
+            return self.tmpfs_dir
+        return self.root
+
+    @contextmanager
+    def job(self, expected_bytes=0):
+        expected_bytes = max(0, int(expected_bytes or 0))
+        path, fd = self.reserve(expected_bytes)
+        scratch_path = path
+        try:
+            scratch_root = self.scratch_root()
+            if scratch_root != self.root:
+                scratch_path = os.path.join(scratch_root, os.path.basename(path))
+                os.makedirs(scratch_path, exist_ok=True)
+            yield JobSpace(path, scratch_path)
+        finally:
+            if scratch_path != path:
+                shutil.rmtree(scratch_path, ignore_errors=True)
+            self.release(path, fd)
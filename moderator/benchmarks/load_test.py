@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import httpx
+
+from stub_llm_server import StubLLM, start_stub_server
+
+
+# -----------------------------------------------------------------------------
+# Corpus
+# -----------------------------------------------------------------------------
+CHAT_PHRASES = [
+    "gg", "L", "W", "pog", "lol", "nice play", "get rekt", "noob", "first", "hello chat",
+    "what a clutch", "that was so bad lol", "you're so bad at this game lol", "ez", "KEKW",
+    "go die", "kys", "you people are subhuman", "shut up you worthless idiot",
+]
+
+def load_corpus(path):
+    texts = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                texts.append(line)
+                continue
+            if isinstance(record, dict):
+                text = record.get("text") or record.get("body") or record.get("title")
+                if text:
+                    texts.append(text)
+            elif isinstance(record, str):
+                texts.append(record)
+    return texts
+
+
+def synthetic_corpus(size, unique_ratio=0.2, seed=0):
+    # Mostly repeated chat phrases with a tail of unique messages, like a real chat log
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(CHAT_PHRASES))]
+    texts = []
+    for i in range(size):
+        if rng.random() < unique_ratio:
+            texts.append(f"{rng.choice(CHAT_PHRASES)} #{i}")
+        else:
+            texts.append(rng.choices(CHAT_PHRASES, weights=weights)[0])
+    return texts
+
+
+
+# -----------------------------------------------------------------------------
+# Targets
+# -----------------------------------------------------------------------------
+def rest_target(url, client):
+    async def moderate(text):
+        resp = await client.post(url, json={"text": text})
+        resp.raise_for_status()
+        return resp.json()["is_inappropriate"]
+    return moderate
+
+
+def inprocess_target():
+    # Same classify_message call the protocol handlers await, without the envelope
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import moderator_agent
+    return moderator_agent.classify_message
+
+
+
+# -----------------------------------------------------------------------------
+# Load
+# -----------------------------------------------------------------------------
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def run_load(moderate, texts, concurrency, rate=None):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for text in texts:
+        queue.put_nowait(text)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                text = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                await moderate(text)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+            if rate:
+                await asyncio.sleep(concurrency / rate)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "messages": len(texts),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_msg_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+    }
+
+
+async def stub_calls(client, stub_url, required=True):
+    """Calls the stub LLM has served, or None when no stub is listening and required is False."""
+    try:
+        resp = await client.get(stub_url.rstrip("/") + "/stats")
+        resp.raise_for_status()
+    except httpx.HTTPError:
+        if required:
+            raise
+        return None
+    return resp.json()["calls"]
+
+
+async def run(args):
+    texts = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.synthetic, seed=args.seed)
+    if args.limit:
+        texts = texts[:args.limit]
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+
+    server = None
+    if args.with_stub:
+        stub = StubLLM(latency_ms=args.stub_latency_ms, jitter=args.stub_jitter, error_rate=args.stub_error_rate, seed=args.seed)
+        server = await start_stub_server(stub, port=args.stub_port)
+        os.environ["ASI_ONE_URL"] = f"{stub_url}/v1/chat/completions"
+        os.environ.setdefault("ASI_ONE_API_KEY", "stub")
+        # An empty value wins over .env, so hedged and failed calls can't fall through to real Gemini
+        os.environ["GEMINI_API_KEY"] = ""
+        os.environ.setdefault("MODERATOR_AGENT_SEED", "load-test")
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        moderate = rest_target(args.url, client) if args.target == "rest" else inprocess_target()
+        # Without --with-stub the stub may still be running on its own (see the README); if not, LLM calls are unknown
+        calls_before = await stub_calls(client, stub_url, required=args.with_stub)
+        report = await run_load(moderate, texts, args.concurrency, args.rate)
+        calls_after = await stub_calls(client, stub_url, required=args.with_stub) if calls_before is not None else None
+        if calls_after is None:
+            report["llm_calls"] = report["llm_calls_per_msg"] = None
+        else:
+            report["llm_calls"] = calls_after - calls_before
+            report["llm_calls_per_msg"] = report["llm_calls"] / len(texts) if texts else 0.0
+
+    if server:
+        server.close()
+        await server.wait_closed()
+
+    report["target"] = args.target
+    report["concurrency"] = args.concurrency
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a chat corpus against the moderator and report throughput and latency.")
+    parser.add_argument("--target", choices=["rest", "inprocess"], default="rest",
+                        help="'rest' posts to /moderate, 'inprocess' awaits classify_message like the protocol handlers")
+    parser.add_argument("--url", default="http://localhost:8002/moderate")
+    parser.add_argument("--corpus", help="JSONL (text/body/title fields) or plain-text file, one message per line")
+    parser.add_argument("--synthetic", type=int, default=2000, help="synthetic chat messages when no corpus is given")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=None, help="target messages/s across all workers")
+    parser.add_argument("--with-stub", action="store_true", help="start the stub LLM in this process")
+    parser.add_argument("--stub-port", type=int, default=8900)
+    parser.add_argument("--stub-latency-ms", type=float, default=300.0)
+    parser.add_argument("--stub-jitter", type=float, default=0.5)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+
+
+# -----------------------------------------------------------------------------
+# Stub LLM
+# -----------------------------------------------------------------------------
+# Local stand-in for the ASI:One chat-completions API. Point the moderator at it with
+#   ASI_ONE_URL=http://127.0.0.1:8900/v1/chat/completions ASI_ONE_API_KEY=stub
+HARMFUL_MARKERS = ("kys", "kill yourself", "die", "subhuman", "worthless")
+NUMBERED_LINE_RE = re.compile(r"^(\d+):\s*(.*)$")
+
+
+class StubLLM:
+    def __init__(self, latency_ms=300.0, jitter=0.5, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def sample_latency(self) -> float:
+        # Log-normal around the median so the tail looks like a real provider
+        return self.latency_ms / 1000.0 * self.rng.lognormvariate(0.0, self.jitter) if self.jitter else self.latency_ms / 1000.0
+
+    @staticmethod
+    def verdict(text: str) -> str:
+        lowered = text.lower()
+        return "YES" if any(marker in lowered for marker in HARMFUL_MARKERS) else "NO"
+
+    def complete(self, body: dict) -> str:
+        content = body["messages"][-1]["content"]
+        numbered = [NUMBERED_LINE_RE.match(line) for line in content.splitlines()]
+        if len(numbered) > 1 and all(numbered):
+            return "\n".join(f"{m.group(1)}: {self.verdict(m.group(2))}" for m in numbered)
+        return self.verdict(content)
+
+    async def handle(self, method: str, path: str, payload: bytes):
+        if method == "GET" and path == "/stats":
+            return 200, {"calls": self.calls, "errors": self.errors}
+        if method != "POST":
+            return 404, {"error": "not found"}
+
+        self.calls += 1
+        await asyncio.sleep(self.sample_latency())
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return 500, {"error": "stub failure"}
+        try:
+            body = json.loads(payload)
+            answer = self.complete(body)
+        except Exception as e:
+            return 400, {"error": str(e)}
+        return 200, {
+            "id": f"stub-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+        }
+
+
+
+# -----------------------------------------------------------------------------
+# HTTP Server
+# -----------------------------------------------------------------------------
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+async def serve_connection(stub: StubLLM, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            payload = await reader.readexactly(int(headers.get("content-length", "0")))
+
+            status, data = await stub.handle(method, path, payload)
+            body = json.dumps(data).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_stub_server(stub: StubLLM, host="127.0.0.1", port=8900):
+    return await asyncio.start_server(lambda r, w: serve_connection(stub, r, w), host, port)
+
+
+
+# -----------------------------------------------------------------------------
+# Run
+# -----------------------------------------------------------------------------
+async def run(args):
+    stub = StubLLM(latency_ms=args.latency_ms, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    server = await start_stub_server(stub, args.host, args.port)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1/chat/completions")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub ASI:One chat-completions server for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="median response latency")
+    parser.add_argument("--jitter", type=float, default=0.5, help="log-normal sigma of the latency, 0 for fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
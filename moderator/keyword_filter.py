@@ -0,0 +1,99 @@
+from typing import Iterable, List
+
+
+# -----------------------------------------------------------------------------
+# Normalization
+# -----------------------------------------------------------------------------
+LEET_MAP = {
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "!": "i", "|": "l", "+": "t",
+}
+ZERO_WIDTH_CHARS = {"\u200b", "\u200c", "\u200d", "\u2060", "\ufeff", "\u00ad"}
+
+
+def normalize_runs(text: str) -> List[list]:
+    """Lowercase text with zero-width chars dropped and leetspeak mapped, as [char, repeat count] runs."""
+    runs = []
+    for ch in text.lower():
+        if ch in ZERO_WIDTH_CHARS:
+            continue
+        ch = LEET_MAP.get(ch, ch)
+        if runs and runs[-1][0] == ch:
+            runs[-1][1] += 1
+        else:
+            runs.append([ch, 1])
+    return runs
+
+
+
+# -----------------------------------------------------------------------------
+# Keyword Matcher
+# -----------------------------------------------------------------------------
+class KeywordMatcher:
+    """Aho-Corasick automaton over normalized text, built once and matched in a single pass.
+
+    The automaton walks runs of repeated letters, so "fuuuck" reaches the same state as "fuck".
+    Each entry still keeps its own run lengths and a match needs at least that many repeats in the
+    text, which keeps "queer" from matching "query" or "nigger" from matching "Niger".
+    """
+
+    def __init__(self, words: Iterable[str], whole_words=False):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for word in words:
+            boundary = whole_words
+            if word.startswith("="):
+                word, boundary = word[1:], True
+            self._add(normalize_runs(word.strip()), boundary)
+        self._build_fail_links()
+
+    @classmethod
+    def from_file(cls, path, whole_words=False):
+        # One entry per line, '#' comments, '=' prefix for whole-word-only entries
+        with open(path, "r", encoding="utf-8") as file:
+            words = [line.strip() for line in file]
+        return cls([w for w in words if w and not w.startswith("#")], whole_words=whole_words)
+
+    def _add(self, runs, boundary):
+        if not runs:
+            return
+        state = 0
+        for ch, _ in runs:
+            if ch not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][ch] = len(self.goto) - 1
+            state = self.goto[state][ch]
+        self.output[state].append((tuple(count for _, count in runs), boundary))
+
+    def _build_fail_links(self):
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+                queue.append(nxt)
+
+    def search(self, text: str) -> bool:
+        runs = normalize_runs(text)
+        state = 0
+        for end, (ch, _) in enumerate(runs, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for counts, boundary in self.output[state]:
+                start = end - len(counts)
+                if any(runs[start + i][1] < count for i, count in enumerate(counts)):
+                    continue
+                if not boundary:
+                    return True
+                before = runs[start - 1][0] if start > 0 else " "
+                after = runs[end][0] if end < len(runs) else " "
+                if not before.isalnum() and not after.isalnum():
+                    return True
+        return False
@@ -0,0 +1,75 @@
+import json
+import math
+import random
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+
+# -----------------------------------------------------------------------------
+# Local Classifier
+# -----------------------------------------------------------------------------
+class LocalClassifier:
+    """Logistic regression over hashed character n-grams, small enough to run per message on CPU."""
+
+    def __init__(self, weights=None, bias=0.0, n_features=2 ** 18, ngram_range=(2, 4)):
+        self.weights: Dict[int, float] = dict(weights or {})
+        self.bias = bias
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(
+            weights={int(k): v for k, v in data["weights"].items()},
+            bias=data.get("bias", 0.0),
+            n_features=data.get("n_features", 2 ** 18),
+            ngram_range=data.get("ngram_range", (2, 4)),
+        )
+
+    def save(self, path):
+        data = {
+            "n_features": self.n_features,
+            "ngram_range": list(self.ngram_range),
+            "bias": self.bias,
+            "weights": {str(k): round(v, 6) for k, v in self.weights.items() if abs(v) > 1e-6},
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+    def features(self, text: str) -> Dict[int, float]:
+        padded = " " + " ".join(text.lower().split()) + " "
+        counts: Dict[int, float] = {}
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                index = zlib.crc32(padded[i:i + n].encode("utf-8")) % self.n_features
+                counts[index] = counts.get(index, 0.0) + 1.0
+        norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+        return {k: v / norm for k, v in counts.items()}
+
+    def _score(self, features: Dict[int, float]) -> float:
+        z = self.bias + sum(self.weights.get(k, 0.0) * v for k, v in features.items())
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        ez = math.exp(z)
+        return ez / (1.0 + ez)
+
+    def predict_proba(self, text: str) -> float:
+        """Probability that the message is Truly Harmful."""
+        return self._score(self.features(text))
+
+    def fit(self, samples: Iterable[Tuple[str, bool]], epochs=10, learning_rate=0.5, l2=1e-6, seed=0):
+        data: List[Tuple[Dict[int, float], float]] = [(self.features(text), 1.0 if label else 0.0) for text, label in samples]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for features, label in data:
+                error = self._score(features) - label
+                for k, v in features.items():
+                    w = self.weights.get(k, 0.0)
+                    self.weights[k] = w - rate * (error * v + l2 * w)
+                self.bias -= rate * error
+        return self
@@ -1,15 +1,25 @@
 import os
+import re
 import json
+import time
+import asyncio
+import threading
 import httpx
+import sqlite3
+import hashlib
 import traceback
+from collections import OrderedDict, deque
 from dotenv import load_dotenv
 from datetime import datetime
+from typing import Dict, List, Optional
 from uuid import uuid4
 from uagents import Agent, Context, Protocol, Model
 from uagents_core.contrib.protocols.chat import (
     ChatMessage, ChatAcknowledgement, TextContent, chat_protocol_spec
 )
 from uagents.setup import fund_agent_if_low
+from local_classifier import LocalClassifier
+from keyword_filter import KeywordMatcher
 
 load_dotenv()
 
@@ -19,6 +29,9 @@ try:
 except Exception:
     genai = None
 
+if genai and os.getenv("GEMINI_API_KEY"):
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
 
 
 # -----------------------------------------------------------------------------
@@ -30,8 +43,36 @@ class Config:
         self.ASI_ONE_API_KEY = os.getenv("ASI_ONE_API_KEY")
         self.ASI_ONE_URL = os.getenv("ASI_ONE_URL", "https://api.asi1.ai/v1/chat/completions")
         self.ASI_ONE_MODEL = os.getenv("ASI_ONE_MODEL", "asi1-mini")
+        self.ASI_ONE_HTTP2 = os.getenv("ASI_ONE_HTTP2", "0") == "1"
+        self.ASI_ONE_MAX_CONNECTIONS = int(os.getenv("ASI_ONE_MAX_CONNECTIONS") or "100")
+        self.ASI_ONE_MAX_KEEPALIVE = int(os.getenv("ASI_ONE_MAX_KEEPALIVE") or "20")
+        self.ASI_ONE_TIMEOUT = float(os.getenv("ASI_ONE_TIMEOUT") or "20")
+        self.ASI_ONE_CONNECT_TIMEOUT = float(os.getenv("ASI_ONE_CONNECT_TIMEOUT") or "5")
         self.GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
         self.DEBUG_ALLOW_NO_LLM = os.getenv("DEBUG_ALLOW_NO_LLM", "0") == "1"
+        self.KEYWORD_LIST_PATH = os.getenv("KEYWORD_LIST_PATH")
+        self.KEYWORD_WHOLE_WORDS = os.getenv("KEYWORD_WHOLE_WORDS", "0") == "1"
+        self.VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE") or "10000")
+        self.VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL") or "3600")
+        self.VERDICT_CACHE_DB = os.getenv("VERDICT_CACHE_DB")
+        self.LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
+        self.LOCAL_MODEL_BENIGN_THRESHOLD = float(os.getenv("LOCAL_MODEL_BENIGN_THRESHOLD") or "0.1")
+        self.LOCAL_MODEL_HARMFUL_THRESHOLD = float(os.getenv("LOCAL_MODEL_HARMFUL_THRESHOLD") or "0.9")
+        self.LLM_BUDGET_MS = float(os.getenv("LLM_BUDGET_MS") or "5000")
+        self.HEDGE_DELAY_MS = float(os.getenv("HEDGE_DELAY_MS") or "1500")
+        self.HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS") or "100")
+        self.DEFAULT_VERDICT = os.getenv("DEFAULT_VERDICT", "0") == "1"
+        self.BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD") or "5")
+        self.BREAKER_COOLDOWN_S = float(os.getenv("BREAKER_COOLDOWN_S") or "30")
+        self.METRICS_PORT = int(os.getenv("METRICS_PORT") or "0")
+        self.FLOOD_ENABLED = (os.getenv("FLOOD_ENABLED") or "1") == "1"
+        self.FLOOD_WINDOW_S = float(os.getenv("FLOOD_WINDOW_S") or "10")
+        self.FLOOD_TEXT_THRESHOLD = int(os.getenv("FLOOD_TEXT_THRESHOLD") or "5")
+        self.FLOOD_SENDER_THRESHOLD = int(os.getenv("FLOOD_SENDER_THRESHOLD") or "3")
+        self.MODERATION_BATCH_CONCURRENCY = int(os.getenv("MODERATION_BATCH_CONCURRENCY") or "16")
+        self.LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "0") == "1"
+        self.LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS") or "30")
+        self.LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE") or "16")
 
     def validate(self):
         if not self.MODERATOR_AGENT_SEED:
@@ -53,6 +94,22 @@ class ModerationRequest(Model):
 class ModerationResponse(Model):
     is_inappropriate: bool
 
+class ModerationBatchRequest(Model):
+    texts: List[str]
+    senders: Optional[List[str]] = None
+
+class ModerationBatchResponse(Model):
+    is_inappropriate: List[bool]
+
+class ModerationStatsResponse(Model):
+    tier_counts: Dict[str, int]
+    tier_hit_rates: Dict[str, float]
+    cache: Dict[str, float]
+
+class MetricsResponse(Model):
+    content_type: str
+    metrics: str
+
 
 
 # -----------------------------------------------------------------------------#
@@ -77,6 +134,154 @@ def handle_json_error(resp: httpx.Response):
 
 
 
+# -----------------------------------------------------------------------------
+# Metrics
+# -----------------------------------------------------------------------------
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self, kind="counter"):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {kind}"]
+        lines += [f"{self.name}{format_labels(key)} {value}" for key, value in self.values.items()]
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self, kind="gauge"):
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.series.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{format_labels(key + (('le', bound),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{format_labels(key + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{format_labels(key)} {count}")
+        return lines
+
+
+stage_latency = Histogram("moderator_stage_latency_seconds", "Latency of each moderation stage.")
+parse_fallbacks = Counter("moderator_parse_fallbacks_total", "LLM replies that were neither YES nor NO.")
+backend_errors = Counter("moderator_backend_errors_total", "Failed calls per LLM backend.")
+inflight_requests = Gauge("moderator_inflight_requests", "Moderation requests currently being classified.")
+backend_inflight = Gauge("moderator_backend_inflight_requests", "LLM calls currently in flight per backend.")
+
+
+def render_metrics() -> str:
+    verdict_sources = Counter("moderator_verdict_source_total", "Verdicts by the tier that decided them.")
+    for tier, count in tier_counts.items():
+        verdict_sources.inc(count, source=tier)
+    cache = verdict_cache.stats()
+    cache_lookups = Counter("moderator_verdict_cache_lookups_total", "Verdict cache lookups by result.")
+    cache_lookups.inc(cache["hits"], result="hit")
+    cache_lookups.inc(cache["misses"], result="miss")
+    breaker_open = Gauge("moderator_circuit_breaker_open", "1 when a backend's circuit breaker is open.")
+    for backend in llm_backends:
+        breaker_open.inc(int(backend.breaker.is_open), backend=backend.name)
+
+    lines = []
+    for metric in (stage_latency, verdict_sources, parse_fallbacks, cache_lookups, backend_errors,
+                   inflight_requests, backend_inflight, breaker_open):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Minimal HTTP endpoint so Prometheus can scrape plain text from METRICS_PORT
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        body = render_metrics().encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {PROMETHEUS_CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+
+# -----------------------------------------------------------------------------
+# HTTP Client
+# -----------------------------------------------------------------------------
+http_client = None
+
+def create_http_client() -> httpx.AsyncClient:
+    http2 = config.ASI_ONE_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("ASI_ONE_HTTP2 is set but the 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(config.ASI_ONE_TIMEOUT, connect=config.ASI_ONE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=config.ASI_ONE_MAX_CONNECTIONS,
+            max_keepalive_connections=config.ASI_ONE_MAX_KEEPALIVE,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = create_http_client()
+    return http_client
+
+
+async def close_http_client():
+    global http_client
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+    http_client = None
+
+
+
 # -----------------------------------------------------------------------------
 # Classify
 # -----------------------------------------------------------------------------
@@ -90,56 +295,385 @@ SYSTEM_PROMPT = (
     "Respond with only one word: 'YES' if it is Truly Harmful, or 'NO' if it is not."
 )
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT.split("Now, analyze")[0] + (
+    "Now, analyze each of the following numbered user messages independently. For each message, decide whether it is **Truly Harmful**. "
+    "Respond with exactly one line per message, in the same order, formatted as '<number>: YES' if it is Truly Harmful or '<number>: NO' if it is not. "
+    "Do not add any other text."
+)
+
 harmful_words = [
     "hate", "slut", "bitch", "bastard", "whore", "motherfucker", "cunt", "nigga", "nigger", "fag", "queer", "retard", "autistic", "kill yourself", "suicide", "rape", "pedophile", "molest", "slavery", "racist", "sexist", "abuse", "incest", "violence", "terrorist", "nazi", "neo-nazi", "antisemite", "blacklist", "sexism", "homophobia", "bigot", "feminazi", "rape culture"
 ]
 
+
+
+# -----------------------------------------------------------------------------
+# Keyword Filter
+# -----------------------------------------------------------------------------
+if config.KEYWORD_LIST_PATH:
+    keyword_matcher = KeywordMatcher.from_file(config.KEYWORD_LIST_PATH, whole_words=config.KEYWORD_WHOLE_WORDS)
+else:
+    keyword_matcher = KeywordMatcher(harmful_words, whole_words=config.KEYWORD_WHOLE_WORDS)
+
+
 def contains_harmful_words(text):
-    return any(word in text.lower() for word in harmful_words)
+    return keyword_matcher.search(text)
+
+
+
+# -----------------------------------------------------------------------------
+# Verdict Cache
+# -----------------------------------------------------------------------------
+def verdict_key(text: str) -> str:
+    # Only case and whitespace are folded: leetspeak and repeat collapsing would make "good" and "god" share a verdict
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """LRU + TTL cache of LLM verdicts, optionally backed by a shared SQLite file.
+
+    SQLite queries run on a worker thread with a short lock timeout, so a busy file costs a
+    cache miss rather than a stalled event loop. Every prune_every writes, expired rows are
+    deleted and the table is cut back to the newest max_size rows.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600.0, db_path=None, db_timeout=0.05, prune_every=256):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.prune_every = prune_every
+        self.writes = 0
+        if db_path:
+            self.db = sqlite3.connect(db_path, timeout=db_timeout, isolation_level=None, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict INTEGER, expires REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS verdicts_expires ON verdicts (expires)")
+            self._db_prune()
+
+    async def get(self, text: str):
+        if self.max_size <= 0:
+            return None
+        key = verdict_key(text)
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry and entry[1] > now:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if entry:
+            del self.entries[key]
+
+        if self.db:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row and row[1] > now:
+                self._put(key, bool(row[0]), row[1])
+                self.hits += 1
+                return bool(row[0])
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, verdict: bool):
+        if self.max_size <= 0:
+            return
+        key = verdict_key(text)
+        expires = time.time() + self.ttl
+        self._put(key, verdict, expires)
+        if self.db:
+            await asyncio.to_thread(self._db_set, key, verdict, expires)
+
+    def _db_get(self, key):
+        try:
+            with self.db_lock:
+                return self.db.execute("SELECT verdict, expires FROM verdicts WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+
+    def _db_set(self, key, verdict, expires):
+        try:
+            with self.db_lock:
+                self.db.execute("INSERT OR REPLACE INTO verdicts (key, verdict, expires) VALUES (?, ?, ?)", (key, int(verdict), expires))
+                self.writes += 1
+                if self.writes % self.prune_every:
+                    return
+            self._db_prune()
+        except sqlite3.Error as e:
+            print(f"Verdict cache write failed: {e}")
+
+    def _db_prune(self):
+        try:
+            with self.db_lock:
+                self.db.execute("DELETE FROM verdicts WHERE expires <= ?", (time.time(),))
+                self.db.execute(
+                    "DELETE FROM verdicts WHERE rowid NOT IN (SELECT rowid FROM verdicts ORDER BY expires DESC LIMIT ?)",
+                    (self.max_size,),
+                )
+        except sqlite3.Error as e:
+            print(f"Verdict cache prune failed: {e}")
 
-async def classify_message(text: str) -> bool:
-    if contains_harmful_words(text):
+    def _put(self, key, verdict, expires):
+        self.entries[key] = (verdict, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+verdict_cache = VerdictCache(
+    max_size=config.VERDICT_CACHE_SIZE,
+    ttl=config.VERDICT_CACHE_TTL,
+    db_path=config.VERDICT_CACHE_DB,
+)
+
+
+
+# -----------------------------------------------------------------------------
+# Flood Detection
+# -----------------------------------------------------------------------------
+class FloodDetector:
+    """Tracks per-text and per-sender repeat rates so flooded messages reuse their first verdict."""
+
+    def __init__(self, window=10.0, text_threshold=5, sender_threshold=3, max_keys=50000, ttl=3600.0):
+        self.window = window
+        self.text_threshold = text_threshold
+        self.sender_threshold = sender_threshold
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.events = OrderedDict()
+        self.first_verdicts = OrderedDict()  # key -> (verdict, expires_at)
+
+    def _hit(self, scope, now) -> int:
+        hits = self.events.get(scope)
+        if hits is None:
+            hits = self.events[scope] = deque()
+        self.events.move_to_end(scope)
+        hits.append(now)
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        while len(self.events) > self.max_keys:
+            self.events.popitem(last=False)
+        return len(hits)
+
+    def check(self, key: str, sender: str = None):
+        now = time.monotonic()
+        flooding = self._hit(("text", key), now) >= self.text_threshold
+        if sender:
+            flooding = self._hit((sender, key), now) >= self.sender_threshold or flooding
+        if flooding:
+            return self._first_verdict(key, now)
+        return None
+
+    def _first_verdict(self, key, now):
+        entry = self.first_verdicts.get(key)
+        if entry is None:
+            return None
+        verdict, expires_at = entry
+        if expires_at <= now:
+            del self.first_verdicts[key]
+            return None
+        return verdict
+
+    def record(self, key: str, verdict: bool):
+        now = time.monotonic()
+        if self._first_verdict(key, now) is not None:
+            return
+        self.first_verdicts[key] = (verdict, now + self.ttl)
+        while len(self.first_verdicts) > self.max_keys:
+            self.first_verdicts.popitem(last=False)
+
+
+flood_detector = FloodDetector(
+    window=config.FLOOD_WINDOW_S,
+    text_threshold=config.FLOOD_TEXT_THRESHOLD,
+    sender_threshold=config.FLOOD_SENDER_THRESHOLD,
+    ttl=config.VERDICT_CACHE_TTL,
+) if config.FLOOD_ENABLED else None
+
+
+
+# -----------------------------------------------------------------------------
+# Local Model
+# -----------------------------------------------------------------------------
+local_model = LocalClassifier.load(config.LOCAL_MODEL_PATH) if config.LOCAL_MODEL_PATH else None
+
+def classify_with_local_model(text: str):
+    """Return a verdict when the local model is confident, or None to defer to the LLM."""
+    if not local_model:
+        return None
+    p = local_model.predict_proba(text)
+    if p >= config.LOCAL_MODEL_HARMFUL_THRESHOLD:
         return True
-    if config.ASI_ONE_API_KEY:
-        return await classify_with_asione(text)
-    if config.GEMINI_API_KEY and genai:
-        return await classify_with_gemini(text)
-    return False
+    if p <= config.LOCAL_MODEL_BENIGN_THRESHOLD:
+        return False
+    return None
+
+
+tier_counts = {"keyword": 0, "flood": 0, "local": 0, "cache": 0, "coalesced": 0, "llm": 0}
+
+def tier_stats() -> ModerationStatsResponse:
+    total = sum(tier_counts.values())
+    return ModerationStatsResponse(
+        tier_counts=dict(tier_counts),
+        tier_hit_rates={tier: (count / total) if total else 0.0 for tier, count in tier_counts.items()},
+        cache=verdict_cache.stats(),
+    )
+
+
+
+# -----------------------------------------------------------------------------
+# Pipeline
+# -----------------------------------------------------------------------------
+async def classify_message(text: str, sender: str = None) -> bool:
+    inflight_requests.inc()
+    try:
+        return await classify_message_tiers(text, sender)
+    finally:
+        inflight_requests.dec()
+
+
+async def classify_message_tiers(text: str, sender: str = None) -> bool:
+    start = time.perf_counter()
+    is_keyword_hit = contains_harmful_words(text)
+    stage_latency.observe(time.perf_counter() - start, stage="keyword")
+    if is_keyword_hit:
+        tier_counts["keyword"] += 1
+        return True
+    key = verdict_key(text)
+    if flood_detector:
+        flooded = flood_detector.check(key, sender)
+        if flooded is not None:
+            tier_counts["flood"] += 1
+            return flooded
+    try:
+        verdict = await classify_without_keywords(text, key)
+    except LLMUnavailableError as e:
+        print(f"LLM unavailable, using default verdict: {e}")
+        return config.DEFAULT_VERDICT
+    if flood_detector:
+        flood_detector.record(key, verdict)
+    return verdict
+
+
+async def classify_without_keywords(text: str, key: str) -> bool:
+    start = time.perf_counter()
+    local = classify_with_local_model(text)
+    if local_model:
+        stage_latency.observe(time.perf_counter() - start, stage="local")
+    if local is not None:
+        tier_counts["local"] += 1
+        return local
+    cached = await verdict_cache.get(text)
+    if cached is not None:
+        tier_counts["cache"] += 1
+        return cached
+
+    task = inflight.get(key)
+    if task is None:
+        tier_counts["llm"] += 1
+        task = inflight[key] = asyncio.ensure_future(classify_and_cache(text))
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    else:
+        tier_counts["coalesced"] += 1
+    return await asyncio.shield(task)
+
+
+inflight: Dict[str, "asyncio.Future[bool]"] = {}
+
+async def classify_and_cache(text: str) -> bool:
+    if batch_scheduler:
+        verdict = await batch_scheduler.submit(text)
+    else:
+        verdict = await classify_with_llm(text)
+    await verdict_cache.set(text, verdict)
+    return verdict
+
+
+async def classify_messages(texts: List[str], senders: Optional[List[str]] = None) -> List[bool]:
+    """Classify texts in order. senders[i], when given, is used for per-sender flood detection of texts[i]."""
+    verdicts = [True if contains_harmful_words(text) else None for text in texts]
+    tier_counts["keyword"] += sum(1 for verdict in verdicts if verdict)
+    semaphore = asyncio.Semaphore(max(1, config.MODERATION_BATCH_CONCURRENCY))
+
+    async def classify_remaining(i):
+        async with semaphore:
+            sender = senders[i] if senders and i < len(senders) else None
+            verdicts[i] = await classify_message(texts[i], sender)
+
+    await asyncio.gather(*(classify_remaining(i) for i, verdict in enumerate(verdicts) if verdict is None))
+    return verdicts
+
+
+async def classify_with_llm(text: str) -> bool:
+    return await call_with_hedging({
+        "asione": lambda: classify_with_asione(text),
+        "gemini": lambda: classify_with_gemini(text),
+    })
+
+
+async def classify_batch_with_llm(texts: List[str]) -> List[bool]:
+    content = "\n".join(f"{i}: {json.dumps(text)}" for i, text in enumerate(texts, 1))
+    raw = await call_with_hedging({
+        "asione": lambda: complete_with_asione(BATCH_SYSTEM_PROMPT, content),
+        "gemini": lambda: complete_with_gemini(BATCH_SYSTEM_PROMPT + "\n\nUSER MESSAGES:\n" + content),
+    })
+    return parse_batch_response(raw, len(texts))
 
 
 async def classify_with_asione(text: str) -> bool:
+    return parse_response(await complete_with_asione(SYSTEM_PROMPT, text))
+
+
+async def classify_with_gemini(text: str) -> bool:
+    return parse_response(await complete_with_gemini(SYSTEM_PROMPT + "\n\nUSER MESSAGE: " + text))
+
+
+async def complete_with_asione(system_prompt: str, content: str):
     headers = {
         "Authorization": f"Bearer {config.ASI_ONE_API_KEY}",
         "Content-Type": "application/json",
     }
     body = {
         "model": config.ASI_ONE_MODEL,
-        "messages": [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": text}],
+        "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}],
     }
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        try:
-            resp = await client.post(config.ASI_ONE_URL, headers=headers, json=body)
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            handle_http_error(e)
-        except Exception as e:
-            handle_network_error(e)
+    client = get_http_client()
+    try:
+        resp = await client.post(config.ASI_ONE_URL, headers=headers, json=body)
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        handle_http_error(e)
+    except Exception as e:
+        handle_network_error(e)
 
-        try:
-            data = resp.json()
-        except Exception as e:
-            handle_json_error(resp)
+    start = time.perf_counter()
+    try:
+        data = resp.json()
+    except Exception as e:
+        handle_json_error(resp)
+    stage_latency.observe(time.perf_counter() - start, stage="json_parse")
 
-    return parse_response(data)
+    return data
 
 
-async def classify_with_gemini(text: str) -> bool:
+async def complete_with_gemini(prompt: str) -> str:
     if not genai:
         raise RuntimeError("Gemini API is not available")
     
     model = genai.GenerativeModel("gemini-1.5-flash-latest")
-    prompt = SYSTEM_PROMPT + "\n\nUSER MESSAGE: " + text
     
     try:
         response = await model.generate_content_async(prompt)
@@ -147,26 +681,228 @@ async def classify_with_gemini(text: str) -> bool:
     except Exception as e:
         raise RuntimeError(f"Gemini call failed: {e}") from e
 
-    return parse_response(raw)
+    return raw
 
 
-def parse_response(raw):
-    normalized = ""
+def response_text(raw) -> str:
+    if isinstance(raw, str):
+        return raw
     if isinstance(raw, dict):
         if 'choices' in raw:
-            normalized = raw['choices'][0]['message']['content']
+            return raw['choices'][0]['message']['content'] or ""
         elif 'output' in raw:
-            normalized = raw['output']
+            return raw['output'] or ""
+    return ""
 
-    if isinstance(normalized, str):
-        normalized = normalized.strip().upper()
+
+def parse_response(raw):
+    normalized = response_text(raw).strip().upper()
     if normalized.startswith("YES"):
         return True
     if normalized.startswith("NO"):
         return False
+    parse_fallbacks.inc()
     return False
 
 
+BATCH_LINE_RE = re.compile(r"^\W*(\d+)\W+(YES|NO)\b")
+
+def parse_batch_response(raw, expected: int) -> List[bool]:
+    verdicts = {}
+    for line in response_text(raw).upper().splitlines():
+        match = BATCH_LINE_RE.match(line.strip())
+        if match:
+            verdicts[int(match.group(1))] = match.group(2) == "YES"
+    if any(i not in verdicts for i in range(1, expected + 1)):
+        raise ValueError(f"Batch reply covered {len(verdicts)} of {expected} messages")
+    return [verdicts[i] for i in range(1, expected + 1)]
+
+
+
+# -----------------------------------------------------------------------------
+# Batching
+# -----------------------------------------------------------------------------
+class BatchScheduler:
+    """Collects LLM classifications arriving within a short window and sends them as one prompt."""
+
+    def __init__(self, window_ms=30.0, max_size=16):
+        self.window = window_ms / 1000.0
+        self.max_size = max(1, max_size)
+        self.pending = []
+        self.timer = None
+        # The loop only keeps weak references to tasks, so in-flight batches are held here
+        self._tasks = set()
+
+    def submit(self, text: str) -> "asyncio.Future[bool]":
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((text, future))
+        if len(self.pending) >= self.max_size:
+            self._flush_now()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self._flush_now)
+        return future
+
+    def _flush_now(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        texts = [text for text, _ in batch]
+        verdicts = None
+        if len(batch) > 1:
+            try:
+                verdicts = await classify_batch_with_llm(texts)
+            except LLMUnavailableError as e:
+                verdicts = [e] * len(batch)
+            except Exception as e:
+                print(f"Batch classification failed, retrying {len(batch)} items individually: {e}")
+        if verdicts is None:
+            verdicts = await asyncio.gather(*(classify_with_llm(text) for text in texts), return_exceptions=True)
+
+        for (_, future), verdict in zip(batch, verdicts):
+            if future.done():
+                continue
+            if isinstance(verdict, BaseException):
+                future.set_exception(verdict)
+            else:
+                future.set_result(verdict)
+
+
+batch_scheduler = BatchScheduler(config.LLM_BATCH_WINDOW_MS, config.LLM_BATCH_MAX_SIZE) if config.LLM_BATCH_ENABLED else None
+
+
+
+# -----------------------------------------------------------------------------
+# Hedging
+# -----------------------------------------------------------------------------
+class LLMUnavailableError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a single trial call through once the cooldown has passed."""
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class LLMBackend:
+    def __init__(self, name, is_configured):
+        self.name = name
+        self.is_configured = is_configured
+        self.breaker = CircuitBreaker(config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_COOLDOWN_S)
+        self.latencies = deque(maxlen=200)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on this backend before hedging, based on its recent p95 latency."""
+        if len(self.latencies) < 20:
+            return config.HEDGE_DELAY_MS / 1000.0
+        ordered = sorted(self.latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        return max(config.HEDGE_MIN_DELAY_MS / 1000.0, p95)
+
+    async def call(self, factory):
+        start = time.perf_counter()
+        backend_inflight.inc(backend=self.name)
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            # A call cancelled by a faster hedge took at least this long; leaving it out would bias p95 low
+            self.latencies.append(time.perf_counter() - start)
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            backend_errors.inc(backend=self.name)
+            stage_latency.observe(time.perf_counter() - start, stage=self.name)
+            raise
+        finally:
+            backend_inflight.dec(backend=self.name)
+        self.latencies.append(time.perf_counter() - start)
+        stage_latency.observe(self.latencies[-1], stage=self.name)
+        self.breaker.record_success()
+        return result
+
+
+llm_backends = [
+    LLMBackend("asione", lambda: bool(config.ASI_ONE_API_KEY)),
+    LLMBackend("gemini", lambda: bool(config.GEMINI_API_KEY and genai)),
+]
+
+
+async def call_with_hedging(calls):
+    """Run the primary backend, hedge to the next one after its p95 delay and return the first success within the budget."""
+    backends = [b for b in llm_backends if b.name in calls and b.is_configured()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.LLM_BUDGET_MS / 1000.0
+    tasks = {}
+    errors = []
+
+    # Breakers are only asked when a backend is actually launched, so an unused hedge target
+    # doesn't spend its half-open trial call
+    def launch_next():
+        while backends:
+            backend = backends.pop(0)
+            if backend.breaker.allow():
+                tasks[asyncio.ensure_future(backend.call(calls[backend.name]))] = backend
+                return loop.time() + backend.hedge_delay()
+        return None
+
+    hedge_at = launch_next()
+    if hedge_at is None:
+        raise LLMUnavailableError("No LLM backend configured or all circuit breakers are open")
+    try:
+        while tasks:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, max(0.0, hedge_at - loop.time())) if backends else remaining
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                backend = tasks.pop(task)
+                if task.exception() is None:
+                    return task.result()
+                errors.append(f"{backend.name}: {task.exception()}")
+            if backends and (not tasks or loop.time() >= hedge_at):
+                hedge_at = launch_next()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if tasks:
+        raise LLMUnavailableError(f"LLM budget of {config.LLM_BUDGET_MS:.0f}ms exhausted")
+    raise LLMUnavailableError("All LLM backends failed: " + "; ".join(errors))
+
+
 
 # -----------------------------------------------------------------------------
 # Agent Creation
@@ -192,16 +928,38 @@ def create_moderator_agent(seed: str) -> Agent:
     except Exception:
         print("fund_agent_if_low failed or not available in this environment")
 
+    @agent.on_event("startup")
+    async def open_http_client(ctx: Context):
+        get_http_client()
+        ctx.logger.info("[moderator] Shared ASI:One HTTP client ready")
+
+    @agent.on_event("shutdown")
+    async def shutdown_http_client(ctx: Context):
+        await close_http_client()
+
+    if config.METRICS_PORT:
+        @agent.on_event("startup")
+        async def start_metrics_server(ctx: Context):
+            await asyncio.start_server(serve_metrics, "0.0.0.0", config.METRICS_PORT)
+            ctx.logger.info(f"[moderator] Prometheus metrics on port {config.METRICS_PORT}")
+
     moderation_protocol = Protocol("ChatModeration")
 
     @moderation_protocol.on_message(model=ModerationRequest, replies=ModerationResponse)
     async def moderate_message(ctx: Context, sender: str, msg: ModerationRequest):
         ctx.logger.info(f"[moderator] Received moderation request for text: '{msg.text}'")
-        is_bad = await classify_message(msg.text)
+        is_bad = await classify_message(msg.text, sender)
         resp = ModerationResponse(is_inappropriate=is_bad)
         await ctx.send(sender, resp)
         ctx.logger.info(f"[moderator] Sent response to caller: is_inappropriate={is_bad}")
 
+    @moderation_protocol.on_message(model=ModerationBatchRequest, replies=ModerationBatchResponse)
+    async def moderate_batch(ctx: Context, sender: str, msg: ModerationBatchRequest):
+        ctx.logger.info(f"[moderator] Received batch moderation request for {len(msg.texts)} messages")
+        verdicts = await classify_messages(msg.texts, msg.senders)
+        await ctx.send(sender, ModerationBatchResponse(is_inappropriate=verdicts))
+        ctx.logger.info(f"[moderator] Sent batch response to caller: {sum(verdicts)} of {len(verdicts)} inappropriate")
+
     chat_proto = Protocol(spec=chat_protocol_spec)
 
     @chat_proto.on_message(ChatMessage)
@@ -214,7 +972,7 @@ def create_moderator_agent(seed: str) -> Agent:
                 user_text = item.text
                 break
 
-        is_bad = await classify_message(user_text) if user_text else False
+        is_bad = await classify_message(user_text, sender) if user_text else False
         reply = f"Inappropriate: {'YES' if is_bad else 'NO'}"
         await ctx.send(sender, ChatMessage(
             timestamp=datetime.utcnow(),
@@ -232,6 +990,19 @@ def create_moderator_agent(seed: str) -> Agent:
     async def rest_moderate(ctx: Context, req: ModerationRequest) -> ModerationResponse:
         is_bad = await classify_message(req.text or "")
         return ModerationResponse(is_inappropriate=is_bad)
+
+    @agent.on_rest_get("/stats", ModerationStatsResponse)
+    async def rest_stats(ctx: Context) -> ModerationStatsResponse:
+        return tier_stats()
+
+    @agent.on_rest_get("/metrics", MetricsResponse)
+    async def rest_metrics(ctx: Context) -> MetricsResponse:
+        return MetricsResponse(content_type=PROMETHEUS_CONTENT_TYPE, metrics=render_metrics())
+
+    @agent.on_rest_post("/moderate/batch", ModerationBatchRequest, ModerationBatchResponse)
+    async def rest_moderate_batch(ctx: Context, req: ModerationBatchRequest) -> ModerationBatchResponse:
+        verdicts = await classify_messages([text or "" for text in req.texts], req.senders)
+        return ModerationBatchResponse(is_inappropriate=verdicts)
     
     try:
         agent.include(moderation_protocol, publish_manifest=True)
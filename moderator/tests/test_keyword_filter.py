@@ -0,0 +1,85 @@
+import pytest
+
+from keyword_filter import KeywordMatcher, normalize_runs
+
+
+WORDS = ["nigger", "queer", "fag", "kill yourself", "=ass"]
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher(WORDS)
+
+
+def test_normalize_runs_maps_leetspeak_and_drops_zero_width():
+    assert normalize_runs("F\u200bu\u00adC|<") == [["f", 1], ["u", 1], ["c", 1], ["l", 1], ["<", 1]]
+    assert normalize_runs("k1ll") == [["k", 1], ["i", 1], ["l", 2]]
+
+
+@pytest.mark.parametrize("text", [
+    "you are a fag",
+    "F4G",
+    "qu33r",
+    "k1ll y0urs3lf",
+    "f\u200ba\u200bg",
+    "q\u200dueer",
+    "faaaaag",
+    "queeeeeer",
+    "kiiill yourself",
+    "KILL YOURSELF",
+])
+def test_matches_obfuscated_words(matcher, text):
+    assert matcher.search(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Niger is a country",
+    "I flew to Nigeria",
+    "run this SQL query",
+    "two queries",
+    "a fig tree",
+    "hello there",
+    "",
+])
+def test_does_not_match_collapsed_lookalikes(matcher, text):
+    assert not matcher.search(text)
+
+
+def test_repeats_must_cover_the_entry_runs():
+    matcher = KeywordMatcher(["nigger"])
+    assert matcher.search("niggger")
+    assert not matcher.search("niger")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("you ass", True),
+    ("a$$", True),
+    ("aaasss?", True),
+    ("ass.", True),
+    ("class", False),
+    ("assume", False),
+    ("grass is green", False),
+])
+def test_whole_word_prefix(matcher, text, expected):
+    assert matcher.search(text) is expected
+
+
+def test_whole_words_option_applies_to_every_entry():
+    matcher = KeywordMatcher(["fag"], whole_words=True)
+    assert matcher.search("fag")
+    assert not matcher.search("fagot")
+
+
+def test_overlapping_entries_after_a_failed_whole_word_match():
+    matcher = KeywordMatcher(["=ass", "sex"])
+    assert matcher.search("assex")
+
+
+def test_from_file_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("# slurs\n\nqueer\n=ass\n", encoding="utf-8")
+    matcher = KeywordMatcher.from_file(path)
+    assert matcher.search("qu33r")
+    assert matcher.search("ass")
+    assert not matcher.search("class")
+    assert not matcher.search("slurs")
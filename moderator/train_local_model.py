@@ -0,0 +1,87 @@
+import json
+import random
+import argparse
+
+from local_classifier import LocalClassifier
+
+
+# -----------------------------------------------------------------------------
+# Data
+# -----------------------------------------------------------------------------
+LABEL_FIELDS = ("is_inappropriate", "label", "harmful")
+
+def parse_label(value):
+    if isinstance(value, str):
+        return value.strip().upper() in ("YES", "TRUE", "1", "HARMFUL")
+    return bool(value)
+
+
+def load_samples(path):
+    samples = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            text = record.get("text")
+            field = next((f for f in LABEL_FIELDS if f in record), None)
+            if text is None or field is None:
+                continue
+            samples.append((text, parse_label(record[field])))
+    return samples
+
+
+
+# -----------------------------------------------------------------------------
+# Evaluation
+# -----------------------------------------------------------------------------
+def evaluate(model, samples, benign_threshold, harmful_threshold):
+    decided = correct = 0
+    for text, label in samples:
+        p = model.predict_proba(text)
+        if p <= benign_threshold or p >= harmful_threshold:
+            decided += 1
+            correct += (p >= harmful_threshold) == label
+    total = len(samples) or 1
+    return {
+        "local_hit_rate": decided / total,
+        "local_accuracy": (correct / decided) if decided else 0.0,
+        "llm_fallthrough_rate": 1 - decided / total,
+    }
+
+
+
+# -----------------------------------------------------------------------------
+# Run
+# -----------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Train the moderator's local n-gram classifier from labeled JSONL logs.")
+    parser.add_argument("data", help="JSONL file with a 'text' field and one of: " + ", ".join(LABEL_FIELDS))
+    parser.add_argument("--output", default="local_model.json")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--holdout", type=float, default=0.1)
+    parser.add_argument("--benign-threshold", type=float, default=0.1)
+    parser.add_argument("--harmful-threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    samples = load_samples(args.data)
+    if not samples:
+        raise SystemExit(f"No labeled samples found in {args.data}")
+    random.Random(0).shuffle(samples)
+    split = int(len(samples) * (1 - args.holdout))
+    train, test = samples[:split], samples[split:] or samples[:split]
+
+    print(f"Training on {len(train)} samples, evaluating on {len(test)}...")
+    model = LocalClassifier().fit(train, epochs=args.epochs, learning_rate=args.learning_rate)
+    report = evaluate(model, test, args.benign_threshold, args.harmful_threshold)
+    for key, value in report.items():
+        print(f"{key}: {value:.3f}")
+
+    model.save(args.output)
+    print(f"Saved model to {args.output} (set LOCAL_MODEL_PATH to use it)")
+
+
+if __name__ == "__main__":
+    main()